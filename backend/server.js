@@ -2,6 +2,7 @@ import express from "express";
 import fs from "fs";
 import cors from "cors";
 import { spawn } from "child_process";
+import { Readable } from "stream";
 
 
 const app = express();
@@ -10,6 +11,56 @@ app.use(express.json());
 
 const DB_PATH = "../frontend/src/db/db.json";
 
+// Long-lived Python fill worker (src/worker.py). Set FILL_WORKER_URL="" to always spawn main.py instead.
+const WORKER_URL = process.env.FILL_WORKER_URL ?? "http://127.0.0.1:5005";
+const WORKER_POLL_MS = 200;
+const WORKER_TIMEOUT_MS = Number(process.env.FILL_WORKER_TIMEOUT_MS || 10 * 60 * 1000);
+const WORKER_FINAL_STATUSES = ["done", "failed", "cancelled"];
+
+// Cancels a job on the worker so it stops using the LLM. Failures are only logged, the job is abandoned anyway.
+async function cancelWorkerJob(jobId) {
+  try {
+    await fetch(`${WORKER_URL}/jobs/${jobId}/cancel`, { method: "POST" });
+  } catch (err) {
+    console.warn(` Could not cancel abandoned fill job ${jobId}:`, err.message);
+  }
+}
+
+// Submits a fill job to the worker and polls until it finishes.
+// Throws an error with `unavailable = true` if the worker can't be reached, so the caller can fall back.
+async function runOnWorker(job) {
+  let submitted;
+  try {
+    submitted = await fetch(`${WORKER_URL}/jobs`, {
+      method: "POST",
+      headers: { "Content-Type": "application/json" },
+      body: JSON.stringify(job),
+    });
+  } catch (err) {
+    err.unavailable = true;
+    throw err;
+  }
+  const body = await submitted.json();
+  if (submitted.status !== 202) {
+    const err = new Error(body.error || `Worker returned HTTP ${submitted.status}`);
+    err.status = submitted.status;
+    throw err;
+  }
+
+  const deadline = Date.now() + WORKER_TIMEOUT_MS;
+  while (Date.now() < deadline) {
+    await new Promise((resolve) => setTimeout(resolve, WORKER_POLL_MS));
+    const polled = await fetch(`${WORKER_URL}/jobs/${body.job_id}`);
+    if (polled.status === 404) {
+      throw new Error(`Fill job ${body.job_id} no longer exists on the worker`);
+    }
+    const status = await polled.json();
+    if (WORKER_FINAL_STATUSES.includes(status.status)) return status;
+  }
+  await cancelWorkerJob(body.job_id);
+  throw new Error(`Timed out waiting for fill job ${body.job_id}`);
+}
+
 app.get("/templates", (req, res) => {
   const data = JSON.parse(fs.readFileSync(DB_PATH, "utf-8"));
   res.json(data);
@@ -57,6 +108,19 @@ app.post("/run-python", async (req, res) => {
       pdf = defaultPdf;
     }
 
+    if (WORKER_URL) {
+      try {
+        const job = await runOnWorker({ transcription: String(transcription), template: template || [], pdf: String(pdf) });
+        const output = job.status === "cancelled" ? "Fill job was cancelled" : job.result || job.error;
+        return res.json({ success: job.status === "done", output });
+      } catch (err) {
+        if (!err.unavailable) {
+          return res.status(err.status || 500).json({ success: false, error: String(err.message || err) });
+        }
+        console.warn(" Fill worker unavailable, spawning python instead:", err.message);
+      }
+    }
+
     const scriptPath = new URL("../src/main.py", import.meta.url).pathname;
     const py = process.env.PYTHON || "python3"; // macOS typically uses python3
     const args = [
@@ -99,4 +163,58 @@ app.post("/run-python", async (req, res) => {
   }
 });
 
+// Streams the progress of a fill as NDJSON (one event per line: queued, started, field..., done/failed/cancelled).
+// The first event carries the job_id, which can be passed to /run-python/:jobId/cancel. Needs the fill worker.
+app.post("/run-python/stream", async (req, res) => {
+  const payload = req.body && req.body.body ? req.body.body : req.body || {};
+  const { transcription, template, pdf, batch_size } = payload;
+  if (!WORKER_URL) {
+    return res.status(503).json({ success: false, error: "Streaming needs the fill worker (FILL_WORKER_URL)" });
+  }
+  if (!transcription || !Array.isArray(template) || !pdf) {
+    return res.status(400).json({ success: false, error: "Missing 'transcription', 'template' or 'pdf'" });
+  }
+
+  try {
+    const submitted = await fetch(`${WORKER_URL}/jobs`, {
+      method: "POST",
+      headers: { "Content-Type": "application/json" },
+      body: JSON.stringify({ transcription: String(transcription), template, pdf: String(pdf), batch_size }),
+    });
+    const job = await submitted.json();
+    if (submitted.status !== 202) {
+      return res.status(submitted.status).json({ success: false, error: job.error });
+    }
+
+    // A client that disconnects before the job is over abandons it: cancel it to free the LLM for other reports.
+    const upstream = new AbortController();
+    res.on("close", () => {
+      if (res.writableFinished) return;
+      upstream.abort();
+      cancelWorkerJob(job.job_id);
+    });
+
+    const events = await fetch(`${WORKER_URL}/jobs/${job.job_id}/events`, { signal: upstream.signal });
+    res.setHeader("Content-Type", "application/x-ndjson");
+    res.setHeader("Cache-Control", "no-cache");
+    Readable.fromWeb(events.body).on("error", () => res.destroy()).pipe(res);
+  } catch (err) {
+    if (err.name === "AbortError") return;
+    console.error(" Error in /run-python/stream:", err);
+    res.status(502).json({ success: false, error: String(err.message || err) });
+  }
+});
+
+app.post("/run-python/:jobId/cancel", async (req, res) => {
+  if (!WORKER_URL) {
+    return res.status(503).json({ success: false, error: "Cancelling needs the fill worker (FILL_WORKER_URL)" });
+  }
+  try {
+    const cancelled = await fetch(`${WORKER_URL}/jobs/${encodeURIComponent(req.params.jobId)}/cancel`, { method: "POST" });
+    res.status(cancelled.status).json(await cancelled.json());
+  } catch (err) {
+    res.status(502).json({ success: false, error: String(err.message || err) });
+  }
+});
+
 app.listen(4000, () => console.log("Server running on port 4000"));
@@ -1,18 +1,49 @@
+import os
+import re
+import logging
 import json
+import queue
+import signal
+import threading
+import multiprocessing
+from collections import Counter
 import requests
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from llm_client import get_default_client
+from extraction_cache import get_default_cache
+from template_index import get_template_index
+from context_selector import ContextSelector
+from tracing import span
 from json_manager import JsonManager
 from input_manager import InputManager
 from pdfrw import PdfReader, PdfWriter
 
 
+logger = logging.getLogger(__name__)
+
+# A "key": value pair whose value is complete, inside a JSON object that is still being generated.
+COMPLETED_JSON_PAIR = re.compile(r'"((?:[^"\\]|\\.)*)"\s*:\s*("(?:[^"\\]|\\.)*"|-?\d+(?:\.\d+)?|null)\s*(?=[,}])')
+
+# Bump this whenever build_prompt or build_batch_prompt change, so cached answers from the old prompts are not reused.
+PROMPT_VERSION = 1
+
 
 class textToJSON():
-    def __init__(self, transcript_text, target_fields, json={}):
+    def __init__(self, transcript_text, target_fields, json=None, batch_size=None, client=None, cache=None, stream=False, cancel=None, context_budget=None):
         self.__transcript_text = transcript_text # str
         self.__target_fields = target_fields # List, contains the template field.
-        self.__json = json # dictionary
+        self.__json = json if json is not None else {} # dictionary
+        self.__batch_size = batch_size # int or None. None -> one LLM request per field.
+        self.__client = client if client is not None else get_default_client() # OllamaClient
+        self.__cache = get_default_cache() if cache is None else (cache or None) # ExtractionCache, False -> no caching
+        self.__stream = stream # bool. True -> nothing runs until the caller iterates stream_fields().
+        self.__cancel = cancel # threading.Event or None. Once set, the remaining LLM requests are abandoned.
+        self.__context_budget = context_budget # int or None. Transcript tokens per field prompt, None -> full transcript.
+        self.__full_text_fields = set() # fields whose selected context missed them, asked again with the full transcript
         self.type_check_all()
-        self.main_loop()
+        self.__selector = ContextSelector(transcript_text, token_budget=context_budget) if context_budget else None
+        if not self.__stream:
+            self.main_loop()
 
     
     def type_check_all(self):
@@ -22,12 +53,19 @@ class textToJSON():
         elif type(self.__target_fields) != list:  
             raise TypeError(f"ERROR in textToJSON() ->\
                 Target fields must be a list. Input:\n\ttarget_fields: {self.__target_fields}")
+        elif self.__batch_size is not None and (type(self.__batch_size) != int or self.__batch_size < 1):
+            raise ValueError(f"ERROR in textToJSON() ->\
+                Batch size must be a positive integer or None. Input:\n\tbatch_size: {self.__batch_size}")
+        elif self.__context_budget is not None and (type(self.__context_budget) != int or self.__context_budget < 1):
+            raise ValueError(f"ERROR in textToJSON() ->\
+                Context budget must be a positive integer or None. Input:\n\tcontext_budget: {self.__context_budget}")
 
    
-    def build_prompt(self, current_field):
+    def build_prompt(self, current_field, text=None):
         """ 
             This method is in charge of the prompt engineering. It creates a specific prompt for each target field. 
             @params: current_field -> represents the current element of the json that is being prompted.
+            @params: text -> the part of the transcript to search, the full transcript by default.
         """
         prompt = f""" 
             SYSTEM PROMPT:
@@ -40,55 +78,279 @@ class textToJSON():
             DATA:
             Target JSON field to find in text: {current_field}
             
-            TEXT: {self.__transcript_text}
+            TEXT: {text if text is not None else self.__transcript_text}
+            """
+
+        return prompt
+
+    def build_batch_prompt(self, fields, text=None):
+        """
+            Builds a single prompt asking for every field in 'fields' at once. The model is asked to
+            answer with a JSON object whose keys are exactly the field names.
+            @params: fields -> list of target fields to extract in one request.
+            @params: text -> the part of the transcript to search, the full transcript by default.
+        """
+        field_list = "\n".join(f'            - "{field}"' for field in fields)
+        prompt = f""" 
+            SYSTEM PROMPT:
+            You are an AI assistant designed to help fillout json files with information extracted from transcribed voice recordings. 
+            You will receive the transcription, and a list of JSON field names whose values you have to identify in the context. 
+            Return only a JSON object that has exactly one key per field name, spelled exactly as given, and a single string as value. 
+            If the field name is plural, and you identify more than one possible value in the text, return them in one string separated by a ";".
+            If you don't identify the value of a field in the provided text, use "-1" as its value.
+            ---
+            DATA:
+            Target JSON fields to find in text:
+{field_list}
+            
+            TEXT: {text if text is not None else self.__transcript_text}
             """
 
         return prompt
 
+    def request_completion(self, prompt, format=None, on_text=None):
+        """
+            Sends a prompt to the Ollama generate endpoint through the LLM client and returns the raw text response.
+            In stream mode the answer is read token by token and on_text(text_so_far) is called after every piece.
+            @params: format -> optional Ollama output format, e.g. "json" for structured output.
+        """
+        if not self.__stream:
+            json_data = self.__client.generate(prompt, format=format, cancel=self.__cancel)
+            return json_data['response']
+
+        text = ""
+        for piece in self.__client.generate_stream(prompt, format=format, cancel=self.__cancel):
+            text += piece
+            if on_text is not None:
+                on_text(text)
+        return text
+
+    def select_context(self, fields):
+        """
+            Returns (text, reduced): the part of the transcript relevant to fields when context selection is on,
+            otherwise (or for fields that already missed with a selected context) the full transcript.
+        """
+        if self.__selector is None or any(field in self.__full_text_fields for field in fields):
+            return self.__transcript_text, False
+        return self.__selector.select(fields, token_budget=self.__context_budget * len(fields))
+
+    def request_field(self, field, emit):
+        """ Per-field extraction path: one LLM request for a single target field, passed to emit(field, value). """
+        with span("prompt_build", field=field):
+            text, reduced = self.select_context([field])
+            prompt = self.build_prompt(field, text)
+        value = self.request_completion(prompt)
+
+        if reduced and value.strip().replace('"', '') == "-1":
+            # Not found in the selected segments, the answer may be elsewhere: ask again with the whole transcript.
+            self.__selector.record_fallback()
+            value = self.request_completion(self.build_prompt(field))
+
+        emit(field, value)
+
+    def request_batch(self, fields, emit):
+        """
+            Batched extraction path: one structured-output LLM request for a group of fields.
+            Every field the model answered correctly is passed to emit(field, raw_value), in stream mode as soon
+            as its value is complete in the generated JSON. Returns the fields that are missing or malformed
+            in the answer, so the caller can retry them. With a selected context, "not found" answers are
+            returned as missing too and are retried with the full transcript.
+        """
+        with span("prompt_build", fields=len(fields)):
+            text, reduced = self.select_context(fields)
+            prompt = self.build_batch_prompt(fields, text)
+        emitted = set()
+
+        def emit_new(answer):
+            for field, value in self.match_batch_answer(fields, answer).items():
+                if reduced and value.strip().replace('"', '') == "-1":
+                    continue
+                if field not in emitted:
+                    emitted.add(field)
+                    emit(field, value)
+
+        def emit_completed_pairs(text):
+            answer = {}
+            for match in COMPLETED_JSON_PAIR.finditer(text):
+                try:
+                    answer[json.loads(f'"{match.group(1)}"')] = json.loads(match.group(2))
+                except ValueError:
+                    continue
+            emit_new(answer)
+
+        try:
+            response = self.request_completion(prompt, format="json", on_text=emit_completed_pairs)
+        except KeyError:
+            response = "" # no 'response' in Ollama's answer, handled as a malformed answer below
+        except requests.RequestException as e:
+            # Still failing after the client's retries (e.g. a large batch timing out): the fields not emitted yet
+            # are returned as missing and asked one by one, as smaller requests.
+            logger.warning(f"Batched request failed ({e}), falling back to per-field requests.")
+            response = "{}"
+
+        with span("response_parse", fields=len(fields)):
+            try:
+                answer = json.loads(response)
+            except ValueError as e:
+                logger.warning(f"Batched answer could not be parsed ({e}), falling back to per-field requests.")
+                answer = {}
+
+            if type(answer) != dict:
+                logger.warning("Batched answer is not a JSON object, falling back to per-field requests.")
+                answer = {}
+
+            emit_new(answer)
+        missing = [field for field in fields if field not in emitted]
+        if reduced:
+            # Asked again one by one with the full transcript, count them as fallbacks of the selection.
+            self.__full_text_fields.update(missing)
+            for _ in missing:
+                self.__selector.record_fallback()
+        return missing
+
+    def match_batch_answer(self, fields, answer):
+        """ Maps a (possibly partial) batched JSON answer back onto fields. Returns {field: raw_value} for the usable values. """
+        # Models sometimes change the case or spacing of the keys, match them loosely.
+        normalized_answer = {self.normalize_key(key): value for key, value in answer.items()}
+
+        values = {}
+        for field in fields:
+            if field in answer:
+                value = answer[field]
+            elif self.normalize_key(field) in normalized_answer:
+                value = normalized_answer[self.normalize_key(field)]
+            else:
+                continue
+
+            if value is None:
+                value = "-1"
+            elif type(value) in (int, float):
+                value = str(value)
+            elif type(value) == list and value and all(type(v) in (str, int, float) for v in value):
+                value = "; ".join(str(v) for v in value)
+
+            if type(value) == str:
+                values[field] = value
+
+        return values
+
+    def normalize_key(self, key):
+        return " ".join(str(key).lower().split())
+
+    def iter_responses(self):
+        """
+            Yields (field, raw_value) for every unique target field, in the order the answers arrive.
+            Cached answers come first, then the LLM requests are dispatched concurrently (the client limits
+            how many are in flight) and each answer is yielded as soon as it is complete.
+            Raises ExtractionCancelled if the cancel event is set, the requests that didn't start are dropped.
+        """
+        unique_fields = list(dict.fromkeys(self.__target_fields))
+
+        # Fields already extracted from this transcript (same label, model and prompt) skip the LLM.
+        uncached_fields = []
+        for field in unique_fields:
+            cached = self.__cache.get(self.cache_key(field)) if self.__cache is not None else None
+            if cached is not None:
+                yield field, cached
+            else:
+                uncached_fields.append(field)
+        if self.__cache is not None and len(uncached_fields) < len(unique_fields):
+            logger.info(f"{len(unique_fields) - len(uncached_fields)}/{len(unique_fields)} field(s) answered from the extraction cache.")
+
+        results = queue.Queue() # (field, raw_value) answers, or (None, future) once a request is over
+        pending = set()
+
+        def emit(field, value):
+            if self.__cache is not None:
+                self.__cache.put(self.cache_key(field), value, self.__transcript_text, self.__client.model)
+            results.put((field, value))
+
+        def start(function, argument):
+            future = self.__client.submit(function, argument, emit)
+            pending.add(future)
+            future.add_done_callback(lambda done: results.put((None, done)))
+
+        if self.__batch_size is not None:
+            for begin in range(0, len(uncached_fields), self.__batch_size):
+                start(self.request_batch, uncached_fields[begin:begin + self.__batch_size])
+        else:
+            for field in uncached_fields:
+                start(self.request_field, field)
+
+        try:
+            while pending:
+                field, item = results.get()
+                if field is not None:
+                    yield field, item
+                    continue
+
+                pending.discard(item)
+                if item.cancelled():
+                    continue
+                missing = item.result() # re-raises the request's error, if any
+                if missing:
+                    logger.info(f"Batched extraction missed {len(missing)} field(s), requesting them one by one: {missing}")
+                    for missing_field in missing:
+                        start(self.request_field, missing_field)
+        finally:
+            for future in pending:
+                future.cancel()
+
+    def cache_key(self, field):
+        prompt_version = PROMPT_VERSION if self.__selector is None else f"{PROMPT_VERSION}:context{self.__context_budget}"
+        return self.__cache.make_key(self.__transcript_text, field, self.__client.model, prompt_version)
+
+    def get_context_stats(self):
+        """ Prompt tokens saved by context selection (see ContextSelector.stats), None if it is off. """
+        return self.__selector.stats() if self.__selector is not None else None
+
     def main_loop(self): #FUTURE -> Refactor this to its own class
-        for field in self.__target_fields:
-            prompt = self.build_prompt(field)
-            # print(prompt)
-            ollama_url = "http://localhost:11434/api/generate"
-
-            payload = {
-                "model": "mistral",
-                "prompt": prompt,
-                "stream": False # don't really know why --> look into this later.
-            }
-
-            response = requests.post(ollama_url, json=payload)
-
-            # parse response
-            json_data = response.json()
-            parsed_response = json_data['response']
-            # print(parsed_response)
-            self.add_response_to_json(field, parsed_response)
+        responses = dict(self.iter_responses())
+
+        # Add answers in the order of the target fields, Fill relies on it.
+        with span("response_parse", fields=len(self.__target_fields)):
+            for field in self.__target_fields:
+                self.add_response_to_json(field, responses[field])
             
-        print("----------------------------------")
-        print("\t[LOG] Resulting JSON created from the input text:")
-        print(json.dumps(self.__json, indent=2))
-        print("--------- extracted data ---------")
+        logger.debug("Resulting JSON created from the input text:\n%s", json.dumps(self.__json, indent=2))
 
         return None
 
+    def stream_fields(self):
+        """
+            Stream mode: yields (field, value) as soon as each field's value is extracted, with value parsed
+            the same way as in get_data(). Once every field is done, get_data() holds the answers in field order.
+        """
+        values = {}
+        for field, response in self.iter_responses():
+            values[field] = self.parse_response(response)
+            yield field, values[field]
+
+        for field in self.__target_fields:
+            self.add_value_to_json(field, values[field])
+
     def add_response_to_json(self, field, value):
         """ 
             this method adds the following value under the specified field, 
             or under a new field if the field doesn't exist, to the json dict 
         """
+        self.add_value_to_json(field, self.parse_response(value))
+        return
+
+    def parse_response(self, value):
+        """ Turns a raw LLM answer into the value stored in the json: None if not found, a list if plural. """
         value = value.strip().replace('"', '')
         parsed_value = None
-        plural = False
  
         if value != "-1":
             parsed_value = value       
         
         if ";" in value:
             parsed_value = self.handle_plural_values(value)
-            plural = True
 
+        return parsed_value
 
+    def add_value_to_json(self, field, parsed_value):
         if field in self.__json.keys():
             self.__json[field].append(parsed_value)
         else: 
@@ -105,7 +367,7 @@ class textToJSON():
         if ";" not in plural_value:
             raise ValueError(f"Value is not plural, doesn't have ; separator, Value: {plural_value}")
         
-        print(f"\t[LOG]: Formating plural values for JSON, [For input {plural_value}]...")
+        logger.debug(f"Formating plural values for JSON, [For input {plural_value}]...")
         values = plural_value.split(";")
         
         # Remove trailing leading whitespace
@@ -115,7 +377,7 @@ class textToJSON():
                 clean_value = values[current].lstrip()
                 values[current] = clean_value
 
-        print(f"\t[LOG]: Resulting formatted list of values: {values}")
+        logger.debug(f"Resulting formatted list of values: {values}")
         
         return values
         
@@ -123,50 +385,187 @@ class textToJSON():
     def get_data(self):
         return self.__json
 
+def open_template(pdf_form: str):
+    """
+    Reads pdf_form and returns (pdf, field_names, widgets): the PdfReader, the unique field names in visual
+    order (page by page, top-to-bottom, left-to-right) from the compiled template index, and a dict
+    {field name: [widget annotations]} built in one pass over the pages.
+    """
+    with span("pdf_read", pdf_form=pdf_form):
+        pdf = PdfReader(pdf_form)
+        field_names = get_template_index().field_names(pdf_form, pdf)
+
+    with span("widget_map", pdf_form=pdf_form) as attributes:
+        widgets = {}
+        for page in pdf.pages:
+            for annot in page.Annots or []:
+                if annot.Subtype == '/Widget' and annot.T:
+                    widgets.setdefault(annot.T[1:-1], []).append(annot)
+        attributes["widgets"] = sum(len(annots) for annots in widgets.values())
+
+    return pdf, field_names, widgets
+
+def set_field_value(widgets: dict, field_name: str, value):
+    for annot in widgets.get(field_name, []):
+        annot.V = f'{value}'
+        annot.AP = None
+
+def write_filled_pdf(pdf_form: str, answers_list: list, output_pdf: str):
+    """
+    Writes answers_list into the fields of pdf_form and saves the result to output_pdf.
+    Answers go to the template's fields in visual order, as recorded in the compiled template index.
+    Module level so it can run in a process pool worker.
+    """
+
+    # Read PDF 
+    pdf, field_names, widgets = open_template(pdf_form)
+
+    with span("widget_map", pdf_form=pdf_form, fields=len(answers_list)):
+        for field_name, answer in zip(field_names, answers_list):
+            set_field_value(widgets, field_name, answer)
+
+    with span("pdf_write", output_pdf=output_pdf):
+        PdfWriter().write(output_pdf, pdf)
+
+    return output_pdf
+
+def make_pdf_pool(max_workers: int):
+    """
+    Returns a process pool for write_filled_pdf. The workers are started with "spawn" rather than forked:
+    the callers (worker slots, bulk extraction threads) are multi-threaded, and a child forked while another
+    thread holds a lock (tracing, template index...) would inherit it locked and hang.
+    The workers ignore SIGINT: a Ctrl+C reaches the whole process group, and the parent decides how to stop.
+    """
+    pool = ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn"), initializer=ignore_interrupts)
+    if threading.current_thread() is threading.main_thread():
+        # Start the workers now with SIGINT ignored, they inherit it: the initializer only runs once their imports are
+        # done, and a Ctrl+C during the imports would kill them and break the pool.
+        handler = signal.signal(signal.SIGINT, signal.SIG_IGN)
+        try:
+            for _ in range(max_workers):
+                pool.submit(ignore_interrupts)
+        finally:
+            signal.signal(signal.SIGINT, handler)
+    return pool
+
+def ignore_interrupts():
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
 class Fill():
     def __init__(self):
         pass
+
+    def output_path(pdf_form: str, output_dir: str = None):
+        """ Returns where the filled copy of pdf_form is written: '<name>_filled.pdf', next to the template by default. """
+        output_name = os.path.basename(pdf_form)[:-4] + "_filled.pdf"
+        return os.path.join(output_dir if output_dir else os.path.dirname(pdf_form), output_name)
     
-    def fill_form(user_input: str, definitions: list, pdf_form: str):
+    def fill_form(user_input: str, definitions: list, pdf_form: str, batch_size: int = None, context_budget: int = None):
         """
         Fill a PDF form with values from user_input using testToJSON.
         Fields are filled in the visual order (top-to-bottom, left-to-right).
+        If batch_size is given, fields are extracted in groups of that size with one LLM request per group.
+        If context_budget is given, each prompt only carries the transcript segments relevant to its fields (about that many tokens).
         """
 
-        output_pdf = pdf_form[:-4] + "_filled.pdf"
+        output_pdf = Fill.output_path(pdf_form)
 
         # Generate dictionary of answers from your original function 
-        t2j = textToJSON(user_input, definitions)
+        t2j = textToJSON(user_input, definitions, batch_size=batch_size, context_budget=context_budget)
         textbox_answers = t2j.get_data()  # This is a dictionary
 
         answers_list = list(textbox_answers.values())
 
-        # Read PDF 
-        pdf = PdfReader(pdf_form)
-
-        # Loop through pages 
-        for page in pdf.pages:
-            if page.Annots:
-                sorted_annots = sorted(
-                    page.Annots,
-                    key=lambda a: (-float(a.Rect[1]), float(a.Rect[0]))
-                )
-
-                i = 0
-                for annot in sorted_annots:
-                    if annot.Subtype == '/Widget' and annot.T:
-                        field_name = annot.T[1:-1]
-                        
-                        if i < len(answers_list):
-                            annot.V = f'{answers_list[i]}'
-                            annot.AP = None
-                            i += 1
-                        else:
-                            # Stop if we run out of answers
-                            break 
-
-        PdfWriter().write(output_pdf, pdf)
+        write_filled_pdf(pdf_form, answers_list, output_pdf)
         
         # Your main.py expects this function to return the path
         return output_pdf
 
+    def fill_form_stream(user_input: str, definitions: list, pdf_form: str, batch_size: int = None, cancel=None, context_budget: int = None):
+        """
+        Streaming version of fill_form. Yields progress events (dicts) while it works:
+            {"event": "field", "field": ..., "value": ...} as soon as each field is extracted,
+            {"event": "done", "output": output_pdf} once the filled PDF is written.
+        The template is parsed in the background while the LLM works and every value is set on its widgets as it
+        arrives, so only the write is left once extraction ends. Setting cancel (a threading.Event) stops the
+        remaining LLM requests, the generator then raises ExtractionCancelled and no PDF is written.
+        """
+
+        output_pdf = Fill.output_path(pdf_form)
+        t2j = textToJSON(user_input, definitions, batch_size=batch_size, stream=True, cancel=cancel, context_budget=context_budget)
+
+        # Answers are positional like in fill_form: the n-th unique definition goes to the n-th field of the form.
+        positions = {field: i for i, field in enumerate(dict.fromkeys(definitions))}
+
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            template = pool.submit(open_template, pdf_form)
+
+            for field, value in t2j.stream_fields():
+                yield {"event": "field", "field": field, "value": value}
+
+                pdf, field_names, widgets = template.result()
+                if positions[field] < len(field_names):
+                    set_field_value(widgets, field_names[positions[field]], value)
+
+            pdf, field_names, widgets = template.result()
+
+        with span("pdf_write", output_pdf=output_pdf):
+            PdfWriter().write(output_pdf, pdf)
+        yield {"event": "done", "output": output_pdf}
+
+    def fill_many(user_input: str, templates: list, batch_size: int = None, output_dir: str = None, max_workers: int = None, cancel=None, context_budget: int = None, pool=None):
+        """
+        Fill several PDF forms from a single transcript ("report once, file everywhere").
+        templates -> list of (pdf_form, definitions) pairs.
+        The field definitions of every template are merged and each unique label is extracted only once,
+        then all the PDFs are written in parallel in a process pool (pdfrw parsing/writing is CPU-bound).
+        Returns a manifest: one {"pdf_form", "output", "error"} dict per template, in the input order.
+        Templates whose outputs would have the same path get '_<position>' (1-based) appended to the file name.
+        cancel -> optional threading.Event that abandons the remaining LLM requests (ExtractionCancelled is raised).
+        pool -> optional executor shared between calls (e.g. by a bulk run), otherwise a process pool is created for this call.
+        """
+
+        # Union of all the field labels, identical labels across templates are extracted once.
+        all_definitions = list(dict.fromkeys(label for _, definitions in templates for label in definitions))
+
+        t2j = textToJSON(user_input, all_definitions, batch_size=batch_size, cancel=cancel, context_budget=context_budget)
+        textbox_answers = t2j.get_data()
+
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+
+        # Compile the template indexes up front, the pool workers then load them instead of re-parsing.
+        for pdf_form, _ in templates:
+            get_template_index().get(pdf_form)
+
+        manifest = []
+        own_pool = pool is None
+        if own_pool:
+            if not max_workers:
+                max_workers = max(1, min(len(templates), os.cpu_count() or 1))
+            pool = make_pdf_pool(max_workers)
+        try:
+            # Templates with the same file name (e.g. a/report.pdf and b/report.pdf in one output_dir) would overwrite
+            # each other, number their outputs by template position instead.
+            output_paths = [Fill.output_path(pdf_form, output_dir) for pdf_form, _ in templates]
+            path_counts = Counter(output_paths)
+            output_paths = [path[:-4] + f"_{i + 1}.pdf" if path_counts[path] > 1 else path for i, path in enumerate(output_paths)]
+
+            futures = []
+            for (pdf_form, definitions), output_pdf in zip(templates, output_paths):
+                answers_list = [textbox_answers[label] for label in dict.fromkeys(definitions)]
+                futures.append(pool.submit(write_filled_pdf, pdf_form, answers_list, output_pdf))
+                manifest.append({"pdf_form": pdf_form, "output": output_pdf, "error": None})
+
+            for entry, future in zip(manifest, futures):
+                try:
+                    future.result()
+                except Exception as e:
+                    logger.error(f"Could not fill {entry['pdf_form']}: {e}")
+                    entry["output"] = None
+                    entry["error"] = str(e)
+        finally:
+            if own_pool:
+                pool.shutdown()
+
+        return manifest
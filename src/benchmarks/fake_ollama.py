@@ -0,0 +1,144 @@
+import re
+import json
+import time
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from context_selector import estimate_tokens
+
+
+class FakeOllama():
+    """
+        Local stand-in for Ollama's /api/generate, for benchmarks without a GPU or a model.
+        It answers the prompts built by textToJSON by looking the field up in the prompt's TEXT as a
+        "The <field> is <value>." sentence (the format of the synthetic transcripts), "-1" otherwise.
+        Latency is latency + prompt tokens * per_prompt_token + answer tokens * per_output_token seconds,
+        and at most `parallel` requests are served at once, like OLLAMA_NUM_PARALLEL.
+        Supports format="json" (batched prompts) and stream=True, and returns Ollama's token counts and durations.
+        For tests, every received payload is kept in `requests`, the most requests seen at once in `peak_in_flight`,
+        and subclasses can override answer() or error_status() to return bad answers or HTTP errors.
+    """
+    def __init__(self, latency=0.05, per_prompt_token=0.0, per_output_token=0.0, parallel=4, host="127.0.0.1", port=0):
+        self.latency = latency
+        self.per_prompt_token = per_prompt_token
+        self.per_output_token = per_output_token
+        self.slots = threading.BoundedSemaphore(parallel) # requests served at the same time
+        self.requests = [] # payloads received, in arrival order
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.__lock = threading.Lock()
+        self.__server = ThreadingHTTPServer((host, port), self.__make_handler())
+        self.__server.daemon_threads = True
+        self.__thread = None
+
+    @property
+    def url(self):
+        host, port = self.__server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self.__thread = threading.Thread(target=self.__server.serve_forever, kwargs={"poll_interval": 0.05}, name="fake-ollama", daemon=True)
+        self.__thread.start()
+        return self
+
+    def stop(self):
+        self.__server.shutdown()
+        self.__server.server_close()
+
+    def answer(self, payload):
+        """ Returns the text the fake model generates for an /api/generate payload. """
+        prompt = payload["prompt"]
+        text = prompt.split("TEXT:", 1)[1] if "TEXT:" in prompt else prompt
+        if payload.get("format") == "json":
+            fields = re.findall(r'^\s*- "(.*)"\s*$', prompt, re.M)
+            return json.dumps({field: self.lookup(field, text) for field in fields})
+        match = re.search(r"Target JSON field to find in text: (.*)", prompt)
+        return self.lookup(match.group(1).strip(), text) if match else "-1"
+
+    def error_status(self, payload):
+        """ HTTP status to fail the request with, None to answer it. """
+        return None
+
+    def count_request(self, payload, delta):
+        with self.__lock:
+            if delta > 0:
+                self.requests.append(payload)
+            self.in_flight += delta
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+
+    def lookup(self, field, text):
+        match = re.search(rf"The {re.escape(field)} is (.+?)\.(?:\s|$)", text, re.I)
+        return match.group(1) if match else "-1"
+
+    def __make_handler(self):
+        fake = self
+
+        class FakeOllamaHandler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                if self.path != "/api/generate":
+                    self.send_error(404)
+                    return
+                payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+                prompt_tokens = estimate_tokens(payload["prompt"])
+
+                fake.count_request(payload, 1)
+                try:
+                    self.serve(payload, prompt_tokens)
+                finally:
+                    fake.count_request(payload, -1)
+
+            def serve(self, payload, prompt_tokens):
+                status = fake.error_status(payload)
+                if status is not None:
+                    return self.send_body(json.dumps({"error": f"fake error {status}"}).encode("utf-8"), status)
+
+                with fake.slots:
+                    started = time.perf_counter()
+                    prompt_seconds = fake.latency + prompt_tokens * fake.per_prompt_token
+                    time.sleep(prompt_seconds)
+                    response = fake.answer(payload)
+                    output_tokens = estimate_tokens(response)
+                    final = {
+                        "model": payload.get("model"),
+                        "done": True,
+                        "prompt_eval_count": prompt_tokens,
+                        "eval_count": output_tokens,
+                        "prompt_eval_duration": int(prompt_seconds * 1e9),
+                        "eval_duration": int(output_tokens * fake.per_output_token * 1e9),
+                    }
+
+                    if not payload.get("stream", True):
+                        time.sleep(output_tokens * fake.per_output_token)
+                        final["response"] = response
+                        final["total_duration"] = int((time.perf_counter() - started) * 1e9)
+                        return self.send_body(json.dumps(final).encode("utf-8"))
+
+                    self.send_response(200)
+                    self.send_header("Content-Type", "application/x-ndjson")
+                    self.send_header("Transfer-Encoding", "chunked")
+                    self.end_headers()
+                    for piece in re.findall(r"\s*\S+", response) or [response]:
+                        time.sleep(estimate_tokens(piece) * fake.per_output_token)
+                        self.send_chunk({"model": payload.get("model"), "response": piece, "done": False})
+                    final["response"] = ""
+                    final["total_duration"] = int((time.perf_counter() - started) * 1e9)
+                    self.send_chunk(final)
+                    self.wfile.write(b"0\r\n\r\n")
+
+            def send_body(self, body, status=200):
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def send_chunk(self, message):
+                data = json.dumps(message).encode("utf-8") + b"\n"
+                self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+                self.wfile.flush()
+
+            def log_message(self, format, *args):
+                pass
+
+        return FakeOllamaHandler
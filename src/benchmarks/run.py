@@ -0,0 +1,135 @@
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import tracemalloc
+import threading
+from itertools import product
+
+
+MODES = {
+    "per-field": {},
+    "batched": {"batch_size": 10},
+    "context": {"context_budget": 150},
+    "batched+context": {"batch_size": 10, "context_budget": 150},
+}
+
+
+def run_scenario(fake, work_dir, fields, transcript_tokens, concurrency, reports, mode, llm_parallel):
+    """
+        Fills `reports` synthetic reports, `concurrency` at a time, against the fake Ollama server and
+        returns the latency, throughput, memory, token and accuracy figures of the run.
+    """
+    from backend import textToJSON, write_filled_pdf
+    from llm_client import OllamaClient
+    from tracing import reset_metrics, metrics_summary
+    from benchmarks.synthetic import make_labels, make_transcript, make_form
+
+    labels = make_labels(fields)
+    form = os.path.join(work_dir, f"form_{fields}.pdf")
+    if not os.path.exists(form):
+        make_form(form, labels)
+    transcripts = [make_transcript(labels, transcript_tokens, seed=i) for i in range(reports)]
+
+    client = OllamaClient(url=fake.url, max_in_flight=llm_parallel, retries=0)
+    reset_metrics()
+    latencies = [None] * reports
+    correct = [0] * reports
+    next_report = iter(range(reports))
+    lock = threading.Lock()
+
+    def fill_reports():
+        while True:
+            with lock:
+                i = next(next_report, None)
+            if i is None:
+                return
+            transcript, expected = transcripts[i]
+            start = time.perf_counter()
+            t2j = textToJSON(transcript, labels, client=client, cache=False, **MODES[mode])
+            answers = t2j.get_data()
+            write_filled_pdf(form, list(answers.values()), os.path.join(work_dir, f"out_{threading.get_ident()}.pdf"))
+            latencies[i] = time.perf_counter() - start
+            correct[i] = sum(1 for label in labels if answers[label] == expected[label])
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    threads = [threading.Thread(target=fill_reports) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - start
+    _, peak_memory = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    client.close()
+
+    timings = metrics_summary()
+    llm = timings.get("llm_request", {})
+    latencies.sort()
+    return {
+        "mode": mode,
+        "fields": fields,
+        "transcript_tokens": transcript_tokens,
+        "concurrency": concurrency,
+        "reports": reports,
+        "latency_mean_s": round(sum(latencies) / reports, 4),
+        "latency_p50_s": round(latencies[reports // 2], 4),
+        "latency_p95_s": round(latencies[min(reports - 1, int(reports * 0.95))], 4),
+        "throughput_reports_per_s": round(reports / wall, 3),
+        "peak_memory_mb": round(peak_memory / 2**20, 2),
+        "llm_requests": llm.get("count", 0),
+        "prompt_tokens_per_report": round(llm.get("prompt_eval_count", 0) / reports, 1),
+        "accuracy": round(sum(correct) / (reports * fields), 4),
+        "stages_mean_ms": {name: stats["mean_ms"] for name, stats in timings.items()},
+    }
+
+def parse_list(value, cast=int):
+    return [cast(item) for item in value.split(",") if item]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline extraction + fill benchmark against a fake Ollama server.")
+    parser.add_argument("--fields", default="5,20,60", help="comma separated field counts")
+    parser.add_argument("--transcript-tokens", default="200,3000", help="comma separated transcript sizes")
+    parser.add_argument("--concurrency", default="1,4", help="comma separated numbers of reports filled at the same time")
+    parser.add_argument("--modes", default=",".join(MODES), help=f"comma separated extraction modes: {', '.join(MODES)}")
+    parser.add_argument("--reports", type=int, default=8, help="reports per scenario")
+    parser.add_argument("--llm-parallel", type=int, default=4, help="requests the fake server (and the client) handle at once")
+    parser.add_argument("--latency", type=float, default=0.02, help="fake LLM fixed latency per request, seconds")
+    parser.add_argument("--per-prompt-token", type=float, default=0.00002, help="fake LLM prompt evaluation time per token, seconds")
+    parser.add_argument("--per-output-token", type=float, default=0.0005, help="fake LLM generation time per token, seconds")
+    parser.add_argument("--output", default=None, help="write the results as JSON to this file")
+    parser.add_argument("--trace", default=None, help="write every timing span to this JSONL file")
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix="fill-bench-")
+    # Keep the benchmark's template indexes out of data/.
+    os.environ.setdefault("TEMPLATE_INDEX_DIR", os.path.join(work_dir, "template_index"))
+
+    from tracing import configure_logging, configure_tracing
+    from benchmarks.fake_ollama import FakeOllama
+    configure_logging(os.environ.get("LOG_LEVEL", "WARNING"))
+    if args.trace:
+        configure_tracing(args.trace)
+
+    fake = FakeOllama(args.latency, args.per_prompt_token, args.per_output_token, parallel=args.llm_parallel).start()
+    results = []
+    try:
+        scenarios = product(parse_list(args.fields), parse_list(args.transcript_tokens), parse_list(args.concurrency), parse_list(args.modes, str))
+        print(f"{'mode':<16}{'fields':>7}{'tokens':>8}{'conc':>6}{'mean s':>9}{'p95 s':>9}{'rep/s':>8}{'mem MB':>8}{'reqs':>6}{'prompt tok':>12}{'acc':>7}")
+        for fields, transcript_tokens, concurrency, mode in scenarios:
+            result = run_scenario(fake, work_dir, fields, transcript_tokens, concurrency, args.reports, mode, args.llm_parallel)
+            results.append(result)
+            print(f"{mode:<16}{fields:>7}{transcript_tokens:>8}{concurrency:>6}{result['latency_mean_s']:>9.3f}{result['latency_p95_s']:>9.3f}"
+                  f"{result['throughput_reports_per_s']:>8.2f}{result['peak_memory_mb']:>8.1f}{result['llm_requests']:>6}"
+                  f"{result['prompt_tokens_per_report']:>12.0f}{result['accuracy']:>7.2f}")
+            sys.stdout.flush()
+    finally:
+        fake.stop()
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
@@ -0,0 +1,81 @@
+import random
+from pdfrw import PdfWriter, PdfDict, PdfName, PdfString, PdfArray
+from context_selector import estimate_tokens
+
+
+FIELD_WORDS = ["incident", "engine", "victim", "hazard", "water", "command", "patient", "vehicle", "shelter", "crew", "road", "power"]
+FIELD_KINDS = ["location", "count", "status", "name", "time", "code", "supervisor", "number", "level", "type", "unit", "notes"]
+FILLER = [
+    "Unit four copy, holding position on the east flank.",
+    "Engine twelve en route, estimated arrival five minutes.",
+    "Copy that dispatch, standing by for further orders.",
+    "Water supply established on the north side of the structure.",
+    "Crew rotating to rehab, two firefighters remain on the line.",
+    "Wind picking up from the west, visibility is getting worse.",
+    "Command, we need another ladder truck at the main entrance.",
+    "Medical staging is set up in the parking lot across the street.",
+]
+
+
+def make_labels(count):
+    """ count unique field labels such as "Engine status", like the ones of an agency template. """
+    labels = [f"{word.capitalize()} {kind}" for word in FIELD_WORDS for kind in FIELD_KINDS]
+    if count > len(labels):
+        labels += [f"Extra field {i}" for i in range(count - len(labels))]
+    return labels[:count]
+
+def make_transcript(labels, target_tokens, seed=0):
+    """
+        Builds a radio-style transcript of about target_tokens tokens (filler chatter, one line per
+        transmission) in which every label's value is stated once as "The <label> is <value>.".
+        Returns (transcript, expected values by label).
+    """
+    rng = random.Random(seed)
+    expected = {label: f"V{i}-{rng.randint(1000, 9999)}" for i, label in enumerate(labels)}
+    facts = [f"The {label} is {value}." for label, value in expected.items()]
+
+    lines = []
+    tokens = sum(estimate_tokens(fact) for fact in facts)
+    while tokens < target_tokens:
+        line = rng.choice(FILLER)
+        lines.append(line)
+        tokens += estimate_tokens(line)
+    for fact in facts:
+        lines.insert(rng.randint(0, len(lines)), fact)
+    return "\n".join(lines), expected
+
+def make_form(path, field_names, widgets_per_page=25):
+    """ Writes a fillable PDF with one text widget per field name, laid out top to bottom over as many pages as needed. """
+    fields = []
+    pages = []
+    for start in range(0, max(len(field_names), 1), widgets_per_page):
+        annots = []
+        for row, name in enumerate(field_names[start:start + widgets_per_page]):
+            y = 760 - row * 28
+            widget = PdfDict(
+                Type=PdfName.Annot,
+                Subtype=PdfName.Widget,
+                FT=PdfName.Tx,
+                T=PdfString.encode(name),
+                V=PdfString.encode(""),
+                Rect=PdfArray([200, y - 20, 550, y]),
+                F=4,
+                DA=PdfString.encode("/Helv 10 Tf 0 g"),
+            )
+            annots.append(widget)
+            fields.append(widget)
+        page = PdfDict(
+            Type=PdfName.Page,
+            MediaBox=PdfArray([0, 0, 612, 792]),
+            Annots=PdfArray(annots),
+            Contents=PdfDict(stream=""),
+            Resources=PdfDict(),
+        )
+        pages.append(page)
+
+    writer = PdfWriter()
+    for page in pages:
+        writer.addpage(page)
+    writer.trailer.Root.AcroForm = PdfDict(Fields=PdfArray(fields), NeedAppearances=True)
+    writer.write(path)
+    return path
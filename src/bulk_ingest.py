@@ -0,0 +1,247 @@
+import os
+import re
+import json
+import hashlib
+import logging
+import time
+import queue
+import argparse
+import threading
+from backend import Fill, make_pdf_pool
+from llm_client import get_default_client
+from tracing import configure_logging, metrics_summary
+
+
+logger = logging.getLogger(__name__)
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+
+
+class BulkIngest():
+    """
+        Turns a backlog of transcripts into filled PDFs for a set of templates.
+        Transcripts are read lazily and go through a bounded queue to a fixed number of extraction threads
+        (so at most that many reports wait on the LLM at once), and the PDFs of every report are written in
+        a process pool shared by the whole run.
+        Every finished item is appended to a JSONL checkpoint, so an interrupted run can be started again
+        with the same checkpoint and only the items that are not done yet are processed.
+    """
+    def __init__(self, templates, output_dir, checkpoint_path=None, workers=None, batch_size=None, context_budget=None, retry_failed=True):
+        self.templates = templates # list of (pdf_form, definitions) pairs
+        self.output_dir = output_dir
+        self.checkpoint_path = checkpoint_path or os.path.join(output_dir, "checkpoint.jsonl")
+        self.workers = workers or get_default_client().max_in_flight
+        self.batch_size = batch_size
+        self.context_budget = context_budget
+        self.retry_failed = retry_failed
+        self.__lock = threading.Lock()
+        self.__stop = threading.Event()
+        self.__records = self.load_checkpoint() # item id -> last record
+
+    def load_checkpoint(self):
+        records = {}
+        try:
+            with open(self.checkpoint_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue # half-written line from an interrupted run
+                    records[record["id"]] = record
+        except FileNotFoundError:
+            pass
+        return records
+
+    def save_record(self, record):
+        with self.__lock:
+            self.__records[record["id"]] = record
+            with open(self.checkpoint_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+
+    def is_finished(self, item_id):
+        record = self.__records.get(item_id)
+        if record is None:
+            return False
+        return record["status"] == "done" or (record["status"] == "failed" and not self.retry_failed)
+
+    def run(self, items):
+        """
+            Processes (item_id, transcript_text) pairs and returns the summary manifest.
+            Items already finished in the checkpoint are skipped. Ctrl+C (at any point of the run) stops
+            feeding new items and drops the queued ones, the ones being processed are finished and
+            checkpointed, and the manifest is written before returning.
+        """
+        os.makedirs(self.output_dir, exist_ok=True)
+        os.makedirs(os.path.dirname(os.path.abspath(self.checkpoint_path)), exist_ok=True)
+        started_at = time.time()
+        skipped = 0
+        pending = queue.Queue(maxsize=self.workers * 2) # backpressure: reading waits for the extraction threads
+
+        pool = make_pdf_pool(max(1, min(len(self.templates), os.cpu_count() or 1)))
+        threads = [threading.Thread(target=self.__work, args=(pending, pool), daemon=True) for _ in range(self.workers)]
+        for thread in threads:
+            thread.start()
+
+        try:
+            for item_id, text in items:
+                if self.is_finished(item_id):
+                    skipped += 1
+                    continue
+                pending.put((item_id, text))
+        except KeyboardInterrupt:
+            self.interrupt()
+        finally:
+            self.stop_threads(pending, threads)
+            pool.shutdown()
+            manifest = self.write_manifest(started_at, skipped)
+        return manifest
+
+    def stop_threads(self, pending, threads):
+        """ Waits for the extraction threads to finish, even if Ctrl+C is pressed again meanwhile: the pool must outlive them. """
+        stops_sent = 0
+        while True:
+            try:
+                while stops_sent < len(threads):
+                    pending.put(None)
+                    stops_sent += 1
+                for thread in threads:
+                    thread.join()
+                return
+            except KeyboardInterrupt:
+                self.interrupt()
+
+    def interrupt(self):
+        if not self.__stop.is_set():
+            logger.info("Interrupted, finishing the reports in progress. Run again with the same checkpoint to resume.")
+        self.__stop.set()
+
+    def __work(self, pending, pool):
+        while True:
+            item = pending.get()
+            if item is None:
+                return
+            if self.__stop.is_set():
+                continue
+            item_id, text = item
+            started_at = time.time()
+            logger.info(f"Processing {item_id}...")
+            try:
+                manifest = Fill.fill_many(
+                    user_input=text,
+                    templates=self.templates,
+                    batch_size=self.batch_size,
+                    output_dir=self.item_output_dir(item_id),
+                    context_budget=self.context_budget,
+                    pool=pool
+                )
+                errors = [entry["error"] for entry in manifest if entry["error"]]
+                record = {
+                    "id": item_id,
+                    "status": "failed" if errors else "done",
+                    "outputs": [entry["output"] for entry in manifest if entry["output"]],
+                    "error": "; ".join(errors) or None,
+                }
+            except Exception as e:
+                record = {"id": item_id, "status": "failed", "outputs": [], "error": str(e)}
+            record["seconds"] = round(time.time() - started_at, 3)
+            self.save_record(record)
+            logger.info(f"{item_id}: {record['status']}" + (f" ({record['error']})" if record["error"] else ""))
+
+    def item_output_dir(self, item_id):
+        """
+            Sub-directory of output_dir for the PDFs of item_id: the id made file-name safe (leading dots removed,
+            so "." or ".." can't point outside), plus a short hash of the raw id so that ids that only differ in
+            the replaced characters ("call 1", "call_1") don't share a directory.
+        """
+        safe_id = re.sub(r"[^a-zA-Z0-9._-]", "_", item_id).lstrip(".")[:64]
+        id_hash = hashlib.sha256(item_id.encode("utf-8")).hexdigest()[:8]
+        return os.path.join(self.output_dir, f"{safe_id}-{id_hash}" if safe_id else id_hash)
+
+    def write_manifest(self, started_at, skipped):
+        with self.__lock:
+            records = list(self.__records.values())
+        manifest = {
+            "started_at": started_at,
+            "finished_at": time.time(),
+            "templates": [pdf_form for pdf_form, _ in self.templates],
+            "done": sum(1 for record in records if record["status"] == "done"),
+            "failed": sum(1 for record in records if record["status"] == "failed"),
+            "skipped_this_run": skipped,
+            "timings": metrics_summary(),
+            "items": records,
+        }
+        manifest_path = os.path.join(self.output_dir, "manifest.json")
+        with open(manifest_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+        logger.info(f"{manifest['done']} done, {manifest['failed']} failed, {skipped} skipped. Manifest: {manifest_path}")
+        return manifest
+
+
+def read_transcripts(path):
+    """
+        Yields (item_id, text) pairs, lazily, from a directory of .txt transcripts (the id is the file name,
+        the 'transcript.txt' latest-copy written by the proxy is skipped) or from a JSONL file of
+        {"id"?, "text"} objects (the id defaults to the line number).
+    """
+    if os.path.isdir(path):
+        for name in sorted(os.listdir(path)):
+            if name.endswith(".txt") and name != "transcript.txt":
+                with open(os.path.join(path, name), "r", encoding="utf-8") as f:
+                    yield name[:-4], f.read()
+        return
+
+    with open(path, "r", encoding="utf-8") as f:
+        for line_number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            yield str(entry.get("id", f"line-{line_number}")), entry["text"]
+
+def read_templates(path):
+    """
+        Reads a JSON list of templates: [{"pdf": <template path>, "fields": [<labels>]}, ...].
+        The format of frontend/src/db/db.json works too ("file" as the path, fields as {"label": ...} objects).
+        Relative PDF paths are resolved from the JSON file's directory.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        entries = json.load(f)
+
+    templates = []
+    for entry in entries:
+        pdf_form = entry.get("pdf") or entry.get("file")
+        if not pdf_form:
+            logger.info(f"Skipping template {entry.get('name', entry)}: no PDF file.")
+            continue
+        pdf_form = os.path.join(os.path.dirname(os.path.abspath(path)), pdf_form)
+        if not os.path.exists(pdf_form):
+            raise FileNotFoundError(f"PDF template not found at {pdf_form}")
+        fields = [field["label"] if type(field) == dict else field for field in entry.get("fields", [])]
+        templates.append((pdf_form, fields))
+    return templates
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fill every template for every transcript of a backlog, resumable.")
+    parser.add_argument("transcripts", help="directory of .txt transcripts or JSONL file of {\"id\", \"text\"} objects")
+    parser.add_argument("templates", help="JSON list of {\"pdf\", \"fields\"} templates")
+    parser.add_argument("--output-dir", default=os.path.join(DATA_DIR, "bulk_output"), help="one sub-directory of filled PDFs per transcript")
+    parser.add_argument("--checkpoint", default=None, help="JSONL checkpoint, <output-dir>/checkpoint.jsonl by default")
+    parser.add_argument("--workers", type=int, default=None, help="reports extracted at the same time, OLLAMA_NUM_PARALLEL by default")
+    parser.add_argument("--batch-size", type=int, default=None, help="fields per LLM request")
+    parser.add_argument("--context-budget", type=int, default=None, help="transcript tokens per prompt, for long transcripts")
+    parser.add_argument("--skip-failed", action="store_true", help="don't retry the items that failed in a previous run")
+    args = parser.parse_args()
+    configure_logging()
+
+    bulk = BulkIngest(
+        templates=read_templates(args.templates),
+        output_dir=args.output_dir,
+        checkpoint_path=args.checkpoint,
+        workers=args.workers,
+        batch_size=args.batch_size,
+        context_budget=args.context_budget,
+        retry_failed=not args.skip_failed
+    )
+    bulk.run(read_transcripts(args.transcripts))
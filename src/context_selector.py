@@ -0,0 +1,125 @@
+import re
+import math
+import threading
+from collections import Counter
+
+
+# Words that say nothing about which part of the transcript a field label refers to.
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "has", "his", "her", "in", "is", "it",
+    "its", "of", "on", "or", "s", "that", "the", "their", "this", "to", "was", "were", "with",
+}
+
+
+def tokenize(text):
+    return [word for word in re.findall(r"\w+", text.lower()) if word not in STOPWORDS]
+
+def estimate_tokens(text):
+    """ Rough LLM token count: words and punctuation marks. Only used to compare and budget prompts. """
+    return len(re.findall(r"\w+|[^\w\s]", text))
+
+
+class ContextSelector():
+    """
+        Picks the parts of a long transcript that are relevant to a field, so the field prompt doesn't carry
+        the whole transcript. The transcript is split into segments of a few sentences (speaker turns and
+        lines are kept apart), indexed with BM25, and for a field the top_k best scoring segments that fit in
+        token_budget are returned in transcript order.
+        If the transcript already fits in the budget, or no segment shares a word with the field, the full
+        text is returned instead.
+    """
+    def __init__(self, transcript_text, top_k=4, token_budget=300, segment_tokens=60, k1=1.5, b=0.75):
+        self.transcript_text = transcript_text
+        self.top_k = top_k
+        self.token_budget = token_budget
+        self.k1 = k1
+        self.b = b
+        self.full_tokens = estimate_tokens(transcript_text)
+        self.segments = self.split_segments(transcript_text, segment_tokens)
+        self.__segment_tokens = [estimate_tokens(segment) for segment in self.segments]
+        self.__term_counts = [Counter(tokenize(segment)) for segment in self.segments]
+        self.__lengths = [sum(counts.values()) for counts in self.__term_counts]
+        self.__average_length = (sum(self.__lengths) / len(self.__lengths)) if self.__lengths else 0
+        document_frequency = Counter(term for counts in self.__term_counts for term in counts)
+        self.__idf = {
+            term: math.log(1 + (len(self.segments) - df + 0.5) / (df + 0.5))
+            for term, df in document_frequency.items()
+        }
+        self.__lock = threading.Lock()
+        self.__stats = {"selections": 0, "reduced": 0, "full_tokens": 0, "selected_tokens": 0, "fallbacks": 0}
+
+    def split_segments(self, text, segment_tokens):
+        """ Splits text into segments of whole sentences, of about segment_tokens tokens each. """
+        segments = []
+        for line in text.splitlines():
+            current, current_tokens = [], 0
+            for sentence in re.split(r"(?<=[.!?])\s+", line.strip()):
+                if not sentence:
+                    continue
+                tokens = estimate_tokens(sentence)
+                if current and current_tokens + tokens > segment_tokens:
+                    segments.append(" ".join(current))
+                    current, current_tokens = [], 0
+                current.append(sentence)
+                current_tokens += tokens
+            if current:
+                segments.append(" ".join(current))
+        return segments
+
+    def score(self, query_terms, i):
+        counts, length = self.__term_counts[i], self.__lengths[i]
+        score = 0.0
+        for term in query_terms:
+            tf = counts.get(term, 0)
+            if tf:
+                norm = tf + self.k1 * (1 - self.b + self.b * length / self.__average_length)
+                score += self.__idf[term] * tf * (self.k1 + 1) / norm
+        return score
+
+    def select(self, fields, token_budget=None):
+        """
+            Returns (text, reduced): the context to put in the prompt of fields (one label or a list of labels),
+            and whether it is smaller than the full transcript.
+            @params: token_budget -> overrides the selector's budget, e.g. for a batch of fields.
+        """
+        if type(fields) == str:
+            fields = [fields]
+        token_budget = token_budget or self.token_budget
+        query_terms = set(term for field in fields for term in tokenize(field))
+
+        selected = []
+        if self.full_tokens > token_budget:
+            scores = [(self.score(query_terms, i), i) for i in range(len(self.segments))]
+            ranked = sorted((pair for pair in scores if pair[0] > 0), key=lambda pair: (-pair[0], pair[1]))
+            used_tokens = 0
+            for _, i in ranked[:self.top_k * len(fields)]:
+                if used_tokens + self.__segment_tokens[i] <= token_budget:
+                    selected.append(i)
+                    used_tokens += self.__segment_tokens[i]
+
+        if selected:
+            text = "\n".join(self.segments[i] for i in sorted(selected))
+        else:
+            text = self.transcript_text
+        reduced = bool(selected)
+
+        with self.__lock:
+            self.__stats["selections"] += 1
+            self.__stats["reduced"] += int(reduced)
+            self.__stats["full_tokens"] += self.full_tokens
+            self.__stats["selected_tokens"] += estimate_tokens(text)
+        return text, reduced
+
+    def record_fallback(self):
+        """ Counts a field that was asked again with the full transcript because the selected context missed it. """
+        with self.__lock:
+            self.__stats["fallbacks"] += 1
+            self.__stats["selected_tokens"] += self.full_tokens
+
+    def stats(self):
+        """ Transcript tokens that would have been sent without selection vs the ones actually sent. """
+        with self.__lock:
+            stats = dict(self.__stats)
+        stats["saved_tokens"] = stats["full_tokens"] - stats["selected_tokens"]
+        stats["saved_ratio"] = stats["saved_tokens"] / stats["full_tokens"] if stats["full_tokens"] else 0.0
+        return stats
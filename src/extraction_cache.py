@@ -0,0 +1,156 @@
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "extraction_cache.sqlite")
+
+
+class ExtractionCache():
+    """
+        Content-addressed cache for raw LLM field answers.
+        Entries are keyed on a hash of (transcript text, normalized field label, model name, prompt version),
+        so the same transcript asked for the same label by the same prompt is answered without calling the LLM.
+        Two tiers: an in-process LRU bounded by max_entries, and a persistent SQLite store (path=None -> memory only).
+        Entries older than ttl seconds are treated as missing (ttl=None -> never expire).
+    """
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_entries=2048, ttl=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.__memory = OrderedDict() # key -> (created_at, value)
+        self.__lock = threading.Lock()
+        self.__stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+        self.__db = None
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self.__db = sqlite3.connect(path, check_same_thread=False)
+            self.__db.execute("""
+                CREATE TABLE IF NOT EXISTS extractions (
+                    key TEXT PRIMARY KEY,
+                    transcript_hash TEXT NOT NULL,
+                    model TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    value TEXT NOT NULL
+                )""")
+            self.__db.execute("CREATE INDEX IF NOT EXISTS extractions_transcript ON extractions (transcript_hash)")
+            self.__db.commit()
+
+    def normalize_label(self, label):
+        return " ".join(str(label).lower().split())
+
+    def transcript_hash(self, transcript_text):
+        return hashlib.sha256(transcript_text.encode("utf-8")).hexdigest()
+
+    def make_key(self, transcript_text, label, model, prompt_version):
+        parts = [self.transcript_hash(transcript_text), self.normalize_label(label), model, str(prompt_version)]
+        return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        """ Returns the cached value for key, or None on a miss. """
+        now = time.time()
+        with self.__lock:
+            entry = self.__memory.get(key)
+            if entry is not None and not self.__expired(entry[0], now):
+                self.__memory.move_to_end(key)
+                self.__stats["memory_hits"] += 1
+                return entry[1]
+
+            if self.__db is not None:
+                row = self.__db.execute("SELECT created_at, value FROM extractions WHERE key = ?", (key,)).fetchone()
+                if row is not None and not self.__expired(row[0], now):
+                    self.__remember(key, row)
+                    self.__stats["disk_hits"] += 1
+                    return row[1]
+
+            self.__stats["misses"] += 1
+            return None
+
+    def put(self, key, value, transcript_text, model):
+        created_at = time.time()
+        with self.__lock:
+            self.__remember(key, (created_at, value))
+            if self.__db is not None:
+                self.__db.execute(
+                    "INSERT OR REPLACE INTO extractions (key, transcript_hash, model, created_at, value) VALUES (?, ?, ?, ?, ?)",
+                    (key, self.transcript_hash(transcript_text), model, created_at, value)
+                )
+                self.__db.commit()
+
+    def invalidate(self, transcript_text=None, model=None):
+        """
+            Drops cached entries. Without arguments the whole cache is cleared, otherwise only the
+            entries of the given transcript and/or model (the memory tier is cleared in both cases).
+        """
+        with self.__lock:
+            self.__memory.clear()
+            if self.__db is None:
+                return
+            conditions, params = [], []
+            if transcript_text is not None:
+                conditions.append("transcript_hash = ?")
+                params.append(self.transcript_hash(transcript_text))
+            if model is not None:
+                conditions.append("model = ?")
+                params.append(model)
+            where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+            self.__db.execute(f"DELETE FROM extractions{where}", params)
+            self.__db.commit()
+
+    def purge_expired(self):
+        """ Deletes the expired entries from the disk tier. """
+        if self.ttl is None or self.__db is None:
+            return
+        with self.__lock:
+            self.__db.execute("DELETE FROM extractions WHERE created_at < ?", (time.time() - self.ttl,))
+            self.__db.commit()
+
+    def stats(self):
+        with self.__lock:
+            stats = dict(self.__stats)
+            stats["memory_entries"] = len(self.__memory)
+            if self.__db is not None:
+                stats["disk_entries"] = self.__db.execute("SELECT COUNT(*) FROM extractions").fetchone()[0]
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = (stats["memory_hits"] + stats["disk_hits"]) / lookups if lookups else 0.0
+        return stats
+
+    def close(self):
+        if self.__db is not None:
+            self.__db.close()
+            self.__db = None
+
+    def __expired(self, created_at, now):
+        return self.ttl is not None and now - created_at > self.ttl
+
+    def __remember(self, key, entry):
+        self.__memory[key] = entry
+        self.__memory.move_to_end(key)
+        while len(self.__memory) > self.max_entries:
+            self.__memory.popitem(last=False)
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+def get_default_cache():
+    """
+        Returns the process-wide ExtractionCache, configured from the environment:
+            EXTRACTION_CACHE=0 disables caching (returns None),
+            EXTRACTION_CACHE_PATH overrides the SQLite file ("" keeps the cache in memory only),
+            EXTRACTION_CACHE_SIZE bounds the memory tier, EXTRACTION_CACHE_TTL sets the TTL in seconds.
+    """
+    global _default_cache
+    if os.environ.get("EXTRACTION_CACHE", "1") == "0":
+        return None
+    with _default_cache_lock:
+        if _default_cache is None:
+            ttl = os.environ.get("EXTRACTION_CACHE_TTL")
+            _default_cache = ExtractionCache(
+                path=os.environ.get("EXTRACTION_CACHE_PATH", DEFAULT_CACHE_PATH),
+                max_entries=int(os.environ.get("EXTRACTION_CACHE_SIZE", 2048)),
+                ttl=float(ttl) if ttl else None
+            )
+        return _default_cache
@@ -0,0 +1,169 @@
+import os
+import json
+import time
+import logging
+import threading
+import requests
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from tracing import span
+
+
+logger = logging.getLogger(__name__)
+
+class ExtractionCancelled(Exception):
+    """ Raised when a request is abandoned because its cancel event was set. """
+    pass
+
+
+class OllamaClient():
+    """
+        Reusable client for the Ollama generate endpoint.
+        Keeps a pooled keep-alive HTTP session, limits the number of requests in flight
+        (match it to the server's OLLAMA_NUM_PARALLEL), and retries failed requests with backoff.
+        Every setting can be passed in or read from the environment:
+            OLLAMA_URL, OLLAMA_MODEL, OLLAMA_NUM_PARALLEL, OLLAMA_TIMEOUT, OLLAMA_RETRIES
+    """
+    RETRY_STATUS = (429, 500, 502, 503, 504)
+
+    def __init__(self, url=None, model=None, max_in_flight=None, timeout=None, retries=None, backoff=0.5):
+        self.url = (url or os.environ.get("OLLAMA_URL", "http://localhost:11434")).rstrip("/")
+        self.model = model or os.environ.get("OLLAMA_MODEL", "mistral")
+        self.max_in_flight = int(max_in_flight or os.environ.get("OLLAMA_NUM_PARALLEL", 4))
+        self.timeout = float(timeout or os.environ.get("OLLAMA_TIMEOUT", 120)) # seconds, per request
+        self.retries = int(retries if retries is not None else os.environ.get("OLLAMA_RETRIES", 2))
+        self.backoff = backoff # seconds, doubled after every failed attempt
+        if self.max_in_flight < 1:
+            raise ValueError(f"ERROR in OllamaClient() -> max_in_flight must be at least 1. Input: {self.max_in_flight}")
+
+        self.__session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_in_flight)
+        self.__session.mount("http://", adapter)
+        self.__session.mount("https://", adapter)
+        self.__in_flight = threading.BoundedSemaphore(self.max_in_flight)
+        self.__executor = ThreadPoolExecutor(max_workers=self.max_in_flight, thread_name_prefix="ollama")
+
+    def generate(self, prompt, format=None, cancel=None):
+        """
+            Sends one prompt to /api/generate and returns the decoded JSON answer from Ollama
+            (the generated text is under the 'response' key).
+            @params: format -> optional Ollama output format, e.g. "json" for structured output.
+            @params: cancel -> optional threading.Event, the request is not sent (or retried) once it is set.
+        """
+        check_cancel(cancel) # cancelled requests are not sent, don't record them as LLM requests
+        with span("llm_request", model=self.model, format=format, stream=False) as attributes:
+            json_data = self.__post(self.__payload(prompt, format, stream=False), cancel, attributes).json()
+            attributes.update(ollama_metrics(json_data))
+        return json_data
+
+    def generate_stream(self, prompt, format=None, cancel=None):
+        """
+            Streaming version of generate: yields the generated text piece by piece as Ollama produces it,
+            and returns (StopIteration value) the final Ollama message with the timing and token counts.
+            If cancel is set while tokens are arriving, the connection is closed, which makes Ollama stop
+            generating, and ExtractionCancelled is raised.
+        """
+        check_cancel(cancel)
+        with span("llm_request", model=self.model, format=format, stream=True) as attributes:
+            response = self.__post(self.__payload(prompt, format, stream=True), cancel, attributes, stream=True)
+            try:
+                for line in response.iter_lines():
+                    check_cancel(cancel)
+                    if not line:
+                        continue
+                    chunk = json.loads(line)
+                    if chunk.get("error"):
+                        raise requests.HTTPError(f"Ollama error: {chunk['error']}", response=response)
+                    if chunk.get("response"):
+                        yield chunk["response"]
+                    if chunk.get("done"):
+                        attributes.update(ollama_metrics(chunk))
+                        return chunk
+                return {}
+            finally:
+                response.close()
+                self.__in_flight.release()
+
+    def __payload(self, prompt, format, stream):
+        payload = {
+            "model": self.model,
+            "prompt": prompt,
+            "stream": stream
+        }
+        if format is not None:
+            payload["format"] = format
+        return payload
+
+    def __post(self, payload, cancel, attributes, stream=False):
+        """
+            POSTs payload to /api/generate, retrying connection errors, timeouts and 429/5xx answers.
+            Streamed responses keep their in-flight slot, the caller releases it once the body is read, see generate_stream.
+            If cancel is set before the request is sent, the llm_request span (attributes) is left out of the metrics.
+        """
+        attempt = 0
+        while True:
+            try:
+                check_cancel(cancel)
+                return self.__post_once(payload, cancel, stream)
+            except ExtractionCancelled:
+                if attempt == 0:
+                    attributes["skip_metrics"] = True
+                raise
+            except (requests.ConnectionError, requests.Timeout, requests.HTTPError) as e:
+                retryable = not isinstance(e, requests.HTTPError) or e.response.status_code in self.RETRY_STATUS
+                if not retryable or attempt >= self.retries:
+                    raise
+                delay = self.backoff * (2 ** attempt)
+                logger.warning(f"Ollama request failed ({e}), retrying in {delay:.1f}s...")
+                time.sleep(delay)
+                attempt += 1
+
+    def __post_once(self, payload, cancel, stream):
+        self.__in_flight.acquire()
+        try:
+            check_cancel(cancel) # cancelled while waiting for a slot
+            response = self.__session.post(f"{self.url}/api/generate", json=payload, timeout=self.timeout, stream=stream)
+            response.raise_for_status()
+        except BaseException:
+            self.__in_flight.release()
+            raise
+        if not stream:
+            self.__in_flight.release()
+        return response
+
+    def submit(self, function, *args):
+        """ Runs function(*args) on the client's thread pool and returns its Future. """
+        return self.__executor.submit(function, *args)
+
+    def close(self):
+        self.__executor.shutdown(wait=True)
+        self.__session.close()
+
+
+def check_cancel(cancel):
+    """ Raises ExtractionCancelled if the cancel event (a threading.Event or None) is set. """
+    if cancel is not None and cancel.is_set():
+        raise ExtractionCancelled()
+
+def ollama_metrics(json_data):
+    """ Token counts and durations (converted from ns to ms) that Ollama returns with a finished answer. """
+    metrics = {}
+    for key in ("prompt_eval_count", "eval_count"):
+        if key in json_data:
+            metrics[key] = json_data[key]
+    for key in ("total_duration", "load_duration", "prompt_eval_duration", "eval_duration"):
+        if key in json_data:
+            metrics[f"{key}_ms"] = json_data[key] / 1e6
+    return metrics
+
+
+_default_client = None
+_default_client_lock = threading.Lock()
+
+def get_default_client():
+    """ Returns a process-wide OllamaClient so the connection pool is shared between requests. """
+    global _default_client
+    with _default_client_lock:
+        if _default_client is None:
+            _default_client = OllamaClient()
+        return _default_client
@@ -1,42 +1,120 @@
 import os
-from backend import Fill  
+import sys
+import json
+import logging
+from backend import Fill
+from tracing import configure_logging, metrics_summary
 
-def run_pdf_fill_process(user_input: str, definitions: list, pdf_form_path: str):
+
+logger = logging.getLogger(__name__)
+
+def run_pdf_fill_process(user_input: str, definitions: list, pdf_form_path: str, batch_size: int = None, context_budget: int = None):
     """
     This function is called by the frontend server.
     It receives the raw data, runs the PDF filling logic,
     and returns the path to the newly created file.
+    batch_size -> optional number of fields extracted per LLM request (None = one request per field).
+    context_budget -> optional transcript tokens per prompt, for long transcripts (None = full transcript).
     """
     
-    print("[1] Received request from frontend.")
-    print(f"[2] PDF template path: {pdf_form_path}")
+    logger.info("[1] Received request from frontend.")
+    logger.info(f"[2] PDF template path: {pdf_form_path}")
     
     if not os.path.exists(pdf_form_path):
-        print(f"Error: PDF template not found at {pdf_form_path}")
+        logger.error(f"PDF template not found at {pdf_form_path}")
         return None # Or raise an exception
 
-    print("[3] Starting extraction and PDF filling process...")
+    logger.info("[3] Starting extraction and PDF filling process...")
     try:
         output_name = Fill.fill_form(
             user_input=user_input,
             definitions=definitions,
-            pdf_form=pdf_form_path
+            pdf_form=pdf_form_path,
+            batch_size=batch_size,
+            context_budget=context_budget
         )
         
-        print("\n----------------------------------")
-        print(f"✅ Process Complete.")
-        print(f"Output saved to: {output_name}")
+        logger.info(f"✅ Process Complete. Output saved to: {output_name}")
         
         return output_name
         
     except Exception as e:
-        print(f"An error occurred during PDF generation: {e}")
+        logger.error(f"An error occurred during PDF generation: {e}")
         # Re-raise the exception so the frontend can handle it
         raise e
 
 
+def run_pdf_fill_stream(user_input: str, definitions: list, pdf_form_path: str, batch_size: int = None, cancel=None, context_budget: int = None):
+    """
+    Streaming version of run_pdf_fill_process: yields progress events while the form is filled,
+    a {"event": "field", ...} event per extracted field and a final {"event": "done", "output": ...}.
+    cancel -> optional threading.Event that abandons the remaining LLM requests (ExtractionCancelled is raised).
+    """
+
+    logger.info(f"[1] Received streaming request, PDF template path: {pdf_form_path}")
+
+    if not os.path.exists(pdf_form_path):
+        raise FileNotFoundError(f"PDF template not found at {pdf_form_path}")
+
+    logger.info("[2] Starting extraction and PDF filling process...")
+    for event in Fill.fill_form_stream(user_input, definitions, pdf_form_path, batch_size=batch_size, cancel=cancel, context_budget=context_budget):
+        if event["event"] == "done":
+            logger.info(f"✅ Process Complete. Output saved to: {event['output']}")
+        yield event
+
+
+def run_pdf_fill_many(user_input: str, templates: list, batch_size: int = None, output_dir: str = None, cancel=None, context_budget: int = None, pool=None):
+    """
+    Same as run_pdf_fill_process, but files the transcript to several agency templates at once.
+    templates -> list of (pdf_form_path, definitions) pairs.
+    Each unique field label is extracted once and all the PDFs are filled in parallel.
+    Returns a manifest with the output path (or error) of every template.
+    pool -> optional long-lived process pool (see backend.make_pdf_pool) for the PDF writes.
+    """
+
+    logger.info(f"[1] Received request for {len(templates)} template(s).")
+
+    for pdf_form_path, _ in templates:
+        if not os.path.exists(pdf_form_path):
+            logger.error(f"PDF template not found at {pdf_form_path}")
+            return None
+
+    logger.info("[2] Starting extraction and PDF filling process...")
+    try:
+        manifest = Fill.fill_many(
+            user_input=user_input,
+            templates=templates,
+            batch_size=batch_size,
+            output_dir=output_dir,
+            cancel=cancel,
+            context_budget=context_budget,
+            pool=pool
+        )
+
+        logger.info("✅ Process Complete.")
+        for entry in manifest:
+            logger.info(f"{entry['pdf_form']} -> {entry['output'] or entry['error']}")
+
+        return manifest
+
+    except Exception as e:
+        logger.error(f"An error occurred during PDF generation: {e}")
+        raise e
+
+
 if __name__ == "__main__":
-    file = "/home/juan/Documents/california/UCSC/rte2025/src/inputs/file.pdf"
-    input = "Hi. The employee's name is John Doe. His job title is managing director. His department supervisor is Jane Doe. His phone number is 123456. His email is jdoe@ucsc.edu. The signature is <Mamañema>, and the date is 01/02/2005"
-    descriptions = ["Employee's name", "Employee's job title", "Employee's department supervisor", "Employee's phone number", "Employee's email", "Signature", "Date"]
-    run_pdf_fill_process(input, descriptions, file)
+    # Called as: python main.py <transcription> <template fields as JSON list> <pdf path>
+    # Without arguments it runs on the sample form in src/inputs.
+    if len(sys.argv) == 4:
+        input = sys.argv[1]
+        descriptions = json.loads(sys.argv[2])
+        file = sys.argv[3]
+    else:
+        file = os.path.join(os.path.dirname(os.path.abspath(__file__)), "inputs", "file.pdf")
+        input = "Hi. The employee's name is John Doe. His job title is managing director. His department supervisor is Jane Doe. His phone number is 123456. His email is jdoe@ucsc.edu. The signature is <Mamañema>, and the date is 01/02/2005"
+        descriptions = ["Employee's name", "Employee's job title", "Employee's department supervisor", "Employee's phone number", "Employee's email", "Signature", "Date"]
+    configure_logging()
+    output = run_pdf_fill_process(input, descriptions, file)
+    logger.info("Timing summary: %s", json.dumps(metrics_summary()))
+    # backend/server.js reads the output path from stdout
+    print(output)
@@ -0,0 +1,150 @@
+import os
+import json
+import hashlib
+import threading
+from pdfrw import PdfReader
+
+
+# Bump this whenever the layout of the compiled index changes, older index files are then recompiled.
+INDEX_VERSION = 1
+DEFAULT_INDEX_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "template_index")
+
+
+class TemplateIndex():
+    """
+        Compiled index of the fillable widgets of PDF templates.
+        A template is parsed once, and for every widget its page, rect, field name, field type and visual
+        order (page by page, top-to-bottom, left-to-right) are stored in a small JSON file under index_dir.
+        Index files are keyed by the template path and reused while the file's mtime/size, or failing that
+        its content hash, are unchanged. Compiled indexes are also kept in memory.
+    """
+    def __init__(self, index_dir=DEFAULT_INDEX_DIR):
+        self.index_dir = index_dir
+        self.__memory = {} # absolute template path -> index dict
+        self.__lock = threading.Lock()
+
+    def get(self, pdf_form, pdf=None):
+        """
+            Returns the index of pdf_form, compiling it if it is missing or stale.
+            @params: pdf -> optional PdfReader of pdf_form that was already parsed, used instead of parsing
+            the file again if a compilation is needed. It must not be modified yet.
+        """
+        path = os.path.abspath(pdf_form)
+        stat = os.stat(path)
+
+        with self.__lock:
+            index = self.__memory.get(path)
+        if index is not None and self.__same_stat(index, stat):
+            return index
+
+        index = self.__load(path)
+        if index is not None and not self.__same_stat(index, stat):
+            # Touched but maybe not changed (copied, checked out again...), compare the content.
+            if index["sha256"] == self.__content_hash(path):
+                index.update(mtime=stat.st_mtime, size=stat.st_size)
+                self.__save(path, index)
+            else:
+                index = None
+
+        if index is None:
+            index = self.compile(path, pdf)
+            self.__save(path, index)
+
+        with self.__lock:
+            self.__memory[path] = index
+        return index
+
+    def compile(self, pdf_form, pdf=None):
+        """ Parses pdf_form and builds its widget index. """
+        path = os.path.abspath(pdf_form)
+        stat = os.stat(path)
+        if pdf is None:
+            pdf = PdfReader(path)
+
+        widgets = []
+        for page_number, page in enumerate(pdf.pages):
+            for annot in page.Annots or []:
+                if annot.Subtype == '/Widget' and annot.T:
+                    field_type = annot.FT or (annot.Parent.FT if annot.Parent else None)
+                    widgets.append({
+                        "name": annot.T[1:-1],
+                        "page": page_number,
+                        "rect": [float(x) for x in annot.Rect],
+                        "type": field_type[1:] if field_type else None,
+                    })
+
+        widgets.sort(key=lambda w: (w["page"], -w["rect"][1], w["rect"][0]))
+        for order, widget in enumerate(widgets):
+            widget["order"] = order
+
+        return {
+            "version": INDEX_VERSION,
+            "path": path,
+            "mtime": stat.st_mtime,
+            "size": stat.st_size,
+            "sha256": self.__content_hash(path),
+            "widgets": widgets,
+        }
+
+    def field_names(self, pdf_form, pdf=None):
+        """ Unique field names of pdf_form in visual order. """
+        return list(dict.fromkeys(widget["name"] for widget in self.get(pdf_form, pdf)["widgets"]))
+
+    def invalidate(self, pdf_form=None):
+        """ Forgets the index of pdf_form, or of every template if pdf_form is None. """
+        with self.__lock:
+            if pdf_form is None:
+                paths = list(self.__memory)
+                self.__memory.clear()
+            else:
+                paths = [os.path.abspath(pdf_form)]
+                self.__memory.pop(paths[0], None)
+        for path in paths:
+            try:
+                os.remove(self.__index_file(path))
+            except FileNotFoundError:
+                pass
+
+    def __index_file(self, path):
+        return os.path.join(self.index_dir, hashlib.sha1(path.encode("utf-8")).hexdigest() + ".json")
+
+    def __load(self, path):
+        try:
+            with open(self.__index_file(path), "r", encoding="utf-8") as f:
+                index = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+        if index.get("version") != INDEX_VERSION or index.get("path") != path:
+            return None
+        return index
+
+    def __save(self, path, index):
+        os.makedirs(self.index_dir, exist_ok=True)
+        # Write to a temporary file first so concurrent readers never see a partial index.
+        index_file = self.__index_file(path)
+        tmp_file = f"{index_file}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump(index, f, separators=(",", ":"))
+        os.replace(tmp_file, index_file)
+
+    def __same_stat(self, index, stat):
+        return index["mtime"] == stat.st_mtime and index["size"] == stat.st_size
+
+    def __content_hash(self, path):
+        sha = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                sha.update(chunk)
+        return sha.hexdigest()
+
+
+_default_index = None
+_default_index_lock = threading.Lock()
+
+def get_template_index():
+    """ Returns the process-wide TemplateIndex (TEMPLATE_INDEX_DIR overrides where index files are stored). """
+    global _default_index
+    with _default_index_lock:
+        if _default_index is None:
+            _default_index = TemplateIndex(os.environ.get("TEMPLATE_INDEX_DIR", DEFAULT_INDEX_DIR))
+        return _default_index
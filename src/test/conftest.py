@@ -0,0 +1,34 @@
+import os
+import sys
+import pytest
+
+# The modules in src/ import each other by their flat names.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import llm_client
+import template_index
+from benchmarks.fake_ollama import FakeOllama
+from llm_client import OllamaClient
+
+
+@pytest.fixture
+def fake_ollama():
+    """ Local stand-in for Ollama, answers "The <field> is <value>." sentences found in the prompt. """
+    fake = FakeOllama(latency=0.0).start()
+    yield fake
+    fake.stop()
+
+@pytest.fixture
+def client(fake_ollama):
+    client = OllamaClient(url=fake_ollama.url, retries=0)
+    yield client
+    client.close()
+
+@pytest.fixture
+def default_client(client, tmp_path, monkeypatch):
+    """ Points the process-wide client (used by Fill and the worker) to the fake Ollama, with no extraction cache and a temporary template index. """
+    monkeypatch.setattr(llm_client, "_default_client", client)
+    monkeypatch.setattr(template_index, "_default_index", None)
+    monkeypatch.setenv("TEMPLATE_INDEX_DIR", str(tmp_path / "index"))
+    monkeypatch.setenv("EXTRACTION_CACHE", "0")
+    return client
@@ -0,0 +1,89 @@
+import re
+import json
+import pytest
+from benchmarks.fake_ollama import FakeOllama
+from llm_client import OllamaClient
+from backend import textToJSON
+
+
+TRANSCRIPT = "The Victim name is Ana Ruiz. The Incident location is 5th Street. The Units is Medic 7; Engine 2."
+FIELDS = ["Victim name", "Incident location", "Units"]
+EXPECTED = {"Victim name": "Ana Ruiz", "Incident location": "5th Street", "Units": ["Medic 7", "Engine 2"]}
+
+
+class ScriptedOllama(FakeOllama):
+    """ Answers batched (format=json) prompts with batch_answer, or fails them with batch_status. Per-field prompts are answered normally. """
+    def __init__(self, batch_answer=None, batch_status=None):
+        super().__init__(latency=0.0)
+        self.batch_answer = batch_answer
+        self.batch_status = batch_status
+
+    def answer(self, payload):
+        if payload.get("format") == "json" and self.batch_answer is not None:
+            return self.batch_answer
+        return super().answer(payload)
+
+    def error_status(self, payload):
+        return self.batch_status if payload.get("format") == "json" else None
+
+    def per_field_requests(self):
+        return [re.search(r"Target JSON field to find in text: (.*)", payload["prompt"]).group(1).strip()
+                for payload in self.requests if payload.get("format") != "json"]
+
+
+@pytest.fixture
+def extract():
+    """ extract(batch_answer=..., batch_status=...) -> (json data, fake server), with batches of every field. """
+    servers, clients = [], []
+
+    def run(batch_answer=None, batch_status=None, stream=False):
+        fake = ScriptedOllama(batch_answer, batch_status).start()
+        client = OllamaClient(url=fake.url, retries=0)
+        servers.append(fake)
+        clients.append(client)
+        t2j = textToJSON(TRANSCRIPT, FIELDS, batch_size=len(FIELDS), client=client, cache=False, stream=stream)
+        if stream:
+            list(t2j.stream_fields())
+        return t2j.get_data(), fake
+
+    yield run
+    for client in clients:
+        client.close()
+    for fake in servers:
+        fake.stop()
+
+
+@pytest.mark.parametrize("stream", [False, True])
+def test_valid_batch_needs_a_single_request(extract, stream):
+    data, fake = extract(stream=stream)
+    assert data == EXPECTED
+    assert len(fake.requests) == 1
+
+@pytest.mark.parametrize("batch_answer", ['{"Victim name": "Ana', "not json at all", '["Ana Ruiz", "5th Street"]', '"Ana Ruiz"', ""])
+def test_malformed_or_non_object_answer_falls_back_for_every_field(extract, batch_answer):
+    data, fake = extract(batch_answer)
+    assert data == EXPECTED
+    assert sorted(fake.per_field_requests()) == sorted(FIELDS)
+
+@pytest.mark.parametrize("stream", [False, True])
+def test_partial_answer_only_retries_the_missing_fields(extract, stream):
+    data, fake = extract(json.dumps({"Victim name": "Ana Ruiz", "Units": {"unexpected": "object"}}), stream=stream)
+    assert data == EXPECTED
+    assert sorted(fake.per_field_requests()) == ["Incident location", "Units"]
+
+def test_keys_are_matched_loosely(extract):
+    data, fake = extract(json.dumps({"victim NAME": "Ana Ruiz", "  Incident   location ": "5th Street", "UNITS": "Medic 7; Engine 2"}))
+    assert data == EXPECTED
+    assert fake.per_field_requests() == []
+
+def test_numbers_lists_and_null_are_converted(extract):
+    data, fake = extract(json.dumps({"Victim name": None, "Incident location": 42, "Units": ["Medic 7", "Engine 2"]}))
+    assert data == {"Victim name": None, "Incident location": "42", "Units": ["Medic 7", "Engine 2"]}
+    assert fake.per_field_requests() == []
+
+@pytest.mark.parametrize("stream", [False, True])
+@pytest.mark.parametrize("batch_status", [500, 503, 400])
+def test_failed_batch_request_falls_back_to_per_field_requests(extract, batch_status, stream):
+    data, fake = extract(batch_status=batch_status, stream=stream)
+    assert data == EXPECTED
+    assert sorted(fake.per_field_requests()) == sorted(FIELDS)
@@ -0,0 +1,121 @@
+import os
+import json
+import pytest
+from backend import Fill
+from bulk_ingest import BulkIngest, read_transcripts
+from benchmarks.synthetic import make_form
+from tracing import reset_metrics, metrics_summary
+
+
+FIELDS = ["Victim name", "Incident location"]
+ITEMS = [
+    ("call-1", "The Victim name is Ana Ruiz. The Incident location is 5th Street."),
+    ("call-2", "The Victim name is Bo Chen. The Incident location is Pier 4."),
+    ("call-3", "The Victim name is Cy Diaz. The Incident location is Main Square."),
+]
+
+
+@pytest.fixture
+def templates(tmp_path, default_client):
+    """ Two templates with the same file name, in different folders. """
+    pairs = []
+    for agency in ("police", "ems"):
+        os.makedirs(tmp_path / agency)
+        pdf_form = str(tmp_path / agency / "report.pdf")
+        make_form(pdf_form, FIELDS)
+        pairs.append((pdf_form, FIELDS))
+    return pairs
+
+def make_bulk(tmp_path, templates, **kwargs):
+    return BulkIngest(templates, str(tmp_path / "out"), workers=2, **kwargs)
+
+def write_checkpoint(tmp_path, *records):
+    os.makedirs(tmp_path / "out", exist_ok=True)
+    with open(tmp_path / "out" / "checkpoint.jsonl", "w", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps(dict({"outputs": [], "error": None, "seconds": 0}, **record)) + "\n")
+        f.write('{"id": "call-') # half-written line of an interrupted run
+
+def llm_requests():
+    return metrics_summary().get("llm_request", {}).get("count", 0)
+
+
+def test_run_fills_every_template_and_writes_checkpoint_and_manifest(tmp_path, templates):
+    manifest = make_bulk(tmp_path, templates).run(iter(ITEMS))
+
+    assert (manifest["done"], manifest["failed"], manifest["skipped_this_run"]) == (3, 0, 0)
+    with open(tmp_path / "out" / "manifest.json", encoding="utf-8") as f:
+        assert json.load(f)["done"] == 3
+    for record in manifest["items"]:
+        assert len(set(record["outputs"])) == 2 # same template file name, distinct outputs
+        assert all(os.path.exists(output) for output in record["outputs"])
+    with open(tmp_path / "out" / "checkpoint.jsonl", encoding="utf-8") as f:
+        assert sorted(json.loads(line)["id"] for line in f) == ["call-1", "call-2", "call-3"]
+
+def test_resume_skips_finished_items(tmp_path, templates):
+    write_checkpoint(tmp_path, {"id": "call-1", "status": "done"})
+    reset_metrics()
+    manifest = make_bulk(tmp_path, templates).run(iter(ITEMS))
+
+    assert (manifest["done"], manifest["skipped_this_run"]) == (3, 1)
+    assert llm_requests() == 2 * len(FIELDS)
+    assert not os.path.exists(tmp_path / "out" / "call-1")
+
+@pytest.mark.parametrize("retry_failed", [True, False])
+def test_failed_items_are_retried_unless_disabled(tmp_path, templates, retry_failed):
+    write_checkpoint(tmp_path, {"id": "call-1", "status": "done"}, {"id": "call-2", "status": "failed", "error": "boom"})
+    manifest = make_bulk(tmp_path, templates, retry_failed=retry_failed).run(iter(ITEMS))
+
+    statuses = {record["id"]: record["status"] for record in manifest["items"]}
+    assert statuses["call-2"] == ("done" if retry_failed else "failed")
+    assert manifest["skipped_this_run"] == (1 if retry_failed else 2)
+
+def test_failure_is_checkpointed_and_retried_on_the_next_run(tmp_path, templates, monkeypatch):
+    fill_many = Fill.fill_many
+    def flaky_fill_many(user_input, **kwargs):
+        if "Bo Chen" in user_input:
+            raise RuntimeError("LLM unavailable")
+        return fill_many(user_input=user_input, **kwargs)
+    monkeypatch.setattr(Fill, "fill_many", flaky_fill_many)
+
+    manifest = make_bulk(tmp_path, templates).run(iter(ITEMS))
+    assert (manifest["done"], manifest["failed"]) == (2, 1)
+    assert [record["error"] for record in manifest["items"] if record["status"] == "failed"] == ["LLM unavailable"]
+
+    monkeypatch.setattr(Fill, "fill_many", fill_many)
+    manifest = make_bulk(tmp_path, templates).run(iter(ITEMS))
+    assert (manifest["done"], manifest["failed"], manifest["skipped_this_run"]) == (3, 0, 2)
+
+def test_interrupted_run_writes_manifest_and_resumes(tmp_path, templates):
+    def interrupted_items():
+        yield ITEMS[0]
+        raise KeyboardInterrupt()
+
+    manifest = make_bulk(tmp_path, templates).run(interrupted_items())
+    assert os.path.exists(tmp_path / "out" / "manifest.json")
+    assert manifest["done"] <= 1 and manifest["failed"] == 0
+
+    reset_metrics()
+    manifest = make_bulk(tmp_path, templates).run(iter(ITEMS))
+    assert manifest["done"] == 3
+    assert llm_requests() == (3 - manifest["skipped_this_run"]) * len(FIELDS)
+
+def test_item_ids_get_distinct_directories_inside_the_output_dir(tmp_path, templates):
+    items = [("call 1", ITEMS[0][1]), ("call_1", ITEMS[1][1]), (".", ITEMS[2][1]), ("..", ITEMS[0][1]), ("../up", ITEMS[1][1])]
+    manifest = make_bulk(tmp_path, templates).run(iter(items))
+
+    assert manifest["done"] == len(items)
+    directories = [os.path.dirname(record["outputs"][0]) for record in manifest["items"]]
+    assert len(set(directories)) == len(items)
+    for directory in directories:
+        assert os.path.dirname(directory) == str(tmp_path / "out")
+        assert not os.path.basename(directory).startswith(".")
+
+def test_read_transcripts_from_directory_and_jsonl(tmp_path):
+    os.makedirs(tmp_path / "transcripts")
+    for name, text in (("b.txt", "second"), ("a.txt", "first"), ("transcript.txt", "latest copy"), ("notes.md", "-")):
+        (tmp_path / "transcripts" / name).write_text(text, encoding="utf-8")
+    assert list(read_transcripts(str(tmp_path / "transcripts"))) == [("a", "first"), ("b", "second")]
+
+    (tmp_path / "calls.jsonl").write_text('{"id": 7, "text": "first"}\n\n{"text": "second"}\n', encoding="utf-8")
+    assert list(read_transcripts(str(tmp_path / "calls.jsonl"))) == [("7", "first"), ("line-3", "second")]
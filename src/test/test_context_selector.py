@@ -0,0 +1,72 @@
+import pytest
+from context_selector import ContextSelector, estimate_tokens, tokenize
+from backend import textToJSON
+from tracing import reset_metrics, metrics_summary
+
+
+FILLER = "\n".join(f"Unit {i} checked the perimeter and reported all clear at the north gate." for i in range(40))
+TRANSCRIPT = FILLER + "\nThe Victim name is Ana Ruiz.\nThe Incident location is 5th Street."
+
+# "caller" is all over the filler, so the selected segments miss the one line that answers the field.
+DECOY_TRANSCRIPT = "\n".join(f"The caller said the caller line {i} rang, caller caller." for i in range(40)) + "\nThe Caller is Jo Park."
+
+
+def prompt_tokens():
+    return metrics_summary()["llm_request"]["prompt_eval_count"]
+
+
+def test_tokenize_drops_stopwords_and_case():
+    assert tokenize("The Victim's name is Ana") == ["victim", "name", "ana"]
+
+def test_segments_keep_lines_apart_and_respect_size():
+    selector = ContextSelector("One. Two. Three.\nFour.", segment_tokens=4)
+    assert selector.segments == ["One. Two.", "Three.", "Four."]
+
+def test_selects_matching_segments_in_transcript_order():
+    selector = ContextSelector(TRANSCRIPT, token_budget=40)
+    text, reduced = selector.select(["Incident location", "Victim name"])
+
+    assert reduced
+    assert text == "The Victim name is Ana Ruiz.\nThe Incident location is 5th Street."
+    assert estimate_tokens(text) <= 40
+
+def test_returns_full_text_when_it_fits_or_nothing_matches():
+    short = "The Victim name is Ana Ruiz."
+    assert ContextSelector(short, token_budget=100).select("Victim name") == (short, False)
+    assert ContextSelector(TRANSCRIPT, token_budget=40).select("Blood type") == (TRANSCRIPT, False)
+
+def test_stats_count_saved_tokens_and_fallbacks():
+    selector = ContextSelector(TRANSCRIPT, token_budget=40)
+    text, _ = selector.select("Victim name")
+    selector.record_fallback()
+
+    stats = selector.stats()
+    assert stats["selections"] == 1 and stats["reduced"] == 1 and stats["fallbacks"] == 1
+    assert stats["full_tokens"] == estimate_tokens(TRANSCRIPT)
+    assert stats["selected_tokens"] == estimate_tokens(text) + estimate_tokens(TRANSCRIPT)
+    assert stats["saved_tokens"] == stats["full_tokens"] - stats["selected_tokens"]
+
+@pytest.mark.parametrize("batch_size", [None, 2])
+def test_selection_sends_fewer_prompt_tokens(client, batch_size):
+    fields = ["Victim name", "Incident location"]
+    reset_metrics()
+    full = textToJSON(TRANSCRIPT, fields, client=client, cache=False, batch_size=batch_size).get_data()
+    full_tokens = prompt_tokens()
+
+    reset_metrics()
+    t2j = textToJSON(TRANSCRIPT, fields, client=client, cache=False, batch_size=batch_size, context_budget=40)
+
+    assert t2j.get_data() == full == {"Victim name": "Ana Ruiz", "Incident location": "5th Street"}
+    assert prompt_tokens() < full_tokens
+    stats = t2j.get_context_stats()
+    assert stats["fallbacks"] == 0 and stats["saved_tokens"] > 0
+
+@pytest.mark.parametrize("batch_size", [None, 4])
+def test_missed_field_falls_back_to_full_transcript(client, batch_size):
+    t2j = textToJSON(DECOY_TRANSCRIPT, ["Caller"], client=client, cache=False, batch_size=batch_size, context_budget=30)
+
+    assert t2j.get_data() == {"Caller": "Jo Park"}
+    stats = t2j.get_context_stats()
+    assert stats["reduced"] == 1
+    assert stats["fallbacks"] == 1
+    assert stats["saved_tokens"] < 0 # the reduced prompt plus the full-transcript retry cost more than no selection
@@ -0,0 +1,112 @@
+import extraction_cache
+from extraction_cache import ExtractionCache
+from backend import textToJSON, PROMPT_VERSION
+from llm_client import OllamaClient
+from tracing import reset_metrics, metrics_summary
+
+
+TRANSCRIPT = "Unit 12 responded. The Victim name is Ana Ruiz. The Incident location is 5th Street."
+FIELDS = ["Victim name", "Incident location"]
+
+
+def llm_requests():
+    return metrics_summary().get("llm_request", {}).get("count", 0)
+
+
+def test_key_depends_on_transcript_label_model_and_prompt_version():
+    cache = ExtractionCache(path=None)
+    key = cache.make_key(TRANSCRIPT, "Victim name", "mistral", 1)
+
+    assert cache.make_key(TRANSCRIPT, "  victim   NAME ", "mistral", 1) == key
+    assert cache.make_key(TRANSCRIPT + ".", "Victim name", "mistral", 1) != key
+    assert cache.make_key(TRANSCRIPT, "Victim names", "mistral", 1) != key
+    assert cache.make_key(TRANSCRIPT, "Victim name", "llama3", 1) != key
+    assert cache.make_key(TRANSCRIPT, "Victim name", "mistral", 2) != key
+
+def test_memory_tier_evicts_least_recently_used():
+    cache = ExtractionCache(path=None, max_entries=2)
+    cache.put("a", "1", TRANSCRIPT, "mistral")
+    cache.put("b", "2", TRANSCRIPT, "mistral")
+    assert cache.get("a") == "1" # "b" is now the least recently used
+    cache.put("c", "3", TRANSCRIPT, "mistral")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "1"
+    assert cache.get("c") == "3"
+    assert cache.stats()["memory_entries"] == 2
+
+def test_disk_tier_answers_after_memory_eviction_and_restart(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    cache = ExtractionCache(path=path, max_entries=1)
+    cache.put("a", "1", TRANSCRIPT, "mistral")
+    cache.put("b", "2", TRANSCRIPT, "mistral")
+
+    assert cache.get("a") == "1"
+    assert cache.stats()["disk_hits"] == 1
+    cache.close()
+
+    reopened = ExtractionCache(path=path)
+    assert reopened.get("b") == "2"
+    assert reopened.stats()["disk_entries"] == 2
+    reopened.close()
+
+def test_entries_expire_after_ttl(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(extraction_cache.time, "time", lambda: now[0])
+    cache = ExtractionCache(path=str(tmp_path / "cache.sqlite"), ttl=60)
+    cache.put("a", "1", TRANSCRIPT, "mistral")
+
+    now[0] += 59
+    assert cache.get("a") == "1"
+    now[0] += 2
+    assert cache.get("a") is None
+
+    cache.purge_expired()
+    assert cache.stats()["disk_entries"] == 0
+    cache.close()
+
+def test_invalidate_by_transcript_and_by_model(tmp_path):
+    cache = ExtractionCache(path=str(tmp_path / "cache.sqlite"))
+    other_transcript = "Another call."
+    entries = {
+        "mistral-1": (TRANSCRIPT, "mistral"),
+        "llama-1": (TRANSCRIPT, "llama3"),
+        "mistral-2": (other_transcript, "mistral"),
+    }
+    for key, (transcript, model) in entries.items():
+        cache.put(key, key, transcript, model)
+
+    cache.invalidate(transcript_text=TRANSCRIPT)
+    assert [key for key in entries if cache.get(key)] == ["mistral-2"]
+
+    cache.put("llama-2", "llama-2", other_transcript, "llama3")
+    cache.invalidate(model="mistral")
+    assert cache.get("mistral-2") is None
+    assert cache.get("llama-2") == "llama-2"
+
+    cache.invalidate()
+    assert cache.stats()["disk_entries"] == 0
+    cache.close()
+
+def test_repeated_extraction_skips_the_llm(client):
+    cache = ExtractionCache(path=None)
+    reset_metrics()
+    first = textToJSON(TRANSCRIPT, FIELDS, client=client, cache=cache).get_data()
+    assert llm_requests() == len(FIELDS)
+
+    second = textToJSON(TRANSCRIPT, FIELDS, client=client, cache=cache).get_data()
+    assert second == first == {"Victim name": "Ana Ruiz", "Incident location": "5th Street"}
+    assert llm_requests() == len(FIELDS)
+    assert cache.get(cache.make_key(TRANSCRIPT, "Victim name", client.model, PROMPT_VERSION)) == "Ana Ruiz"
+
+def test_other_model_or_transcript_misses(fake_ollama, client):
+    cache = ExtractionCache(path=None)
+    textToJSON(TRANSCRIPT, FIELDS, client=client, cache=cache)
+    reset_metrics()
+
+    other_client = OllamaClient(url=fake_ollama.url, model="llama3", retries=0)
+    textToJSON(TRANSCRIPT, FIELDS, client=other_client, cache=cache)
+    other_client.close()
+    textToJSON(TRANSCRIPT + " Nothing else.", FIELDS, client=client, cache=cache)
+
+    assert llm_requests() == 2 * len(FIELDS)
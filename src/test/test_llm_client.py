@@ -0,0 +1,120 @@
+import re
+import time
+import threading
+import pytest
+import requests
+from benchmarks.fake_ollama import FakeOllama
+from benchmarks.synthetic import make_labels, make_transcript
+from llm_client import OllamaClient
+from backend import textToJSON
+
+
+PROMPT = "TEXT: The Victim name is Ana Maria Ruiz.\nTarget JSON field to find in text: Victim name"
+
+
+class FlakyOllama(FakeOllama):
+    """ Fails the first `failures` requests with HTTP `status`, then answers normally. """
+    def __init__(self, failures, status, **kwargs):
+        super().__init__(**kwargs)
+        self.failures = failures
+        self.status = status
+        self.__lock = threading.Lock()
+
+    def error_status(self, payload):
+        with self.__lock:
+            if self.failures > 0:
+                self.failures -= 1
+                return self.status
+        return None
+
+class SlowFirstOllama(FakeOllama):
+    """ Answers the fields in reverse order: the earlier a field comes in the template, the longer it takes. """
+    def __init__(self, fields, **kwargs):
+        super().__init__(**kwargs)
+        self.fields = fields
+
+    def answer(self, payload):
+        field = re.search(r"Target JSON field to find in text: (.*)", payload["prompt"]).group(1).strip()
+        time.sleep((len(self.fields) - self.fields.index(field)) * 0.02)
+        return super().answer(payload)
+
+
+@pytest.fixture
+def serve():
+    """ Starts fake Ollama servers and clients for them, and stops them after the test. """
+    started = []
+
+    def start(fake, **kwargs):
+        client = OllamaClient(url=fake.start().url, **kwargs)
+        started.append((fake, client))
+        return client
+
+    yield start
+    for fake, client in started:
+        client.close()
+        fake.stop()
+
+
+def test_requests_in_flight_are_limited(serve):
+    fake = FakeOllama(latency=0.05, parallel=8)
+    client = serve(fake, max_in_flight=2)
+
+    threads = [threading.Thread(target=client.generate, args=(PROMPT,)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(fake.requests) == 8
+    assert fake.peak_in_flight == 2
+
+@pytest.mark.parametrize("stream", [False, True])
+@pytest.mark.parametrize("status", [429, 500, 503])
+def test_retryable_errors_are_retried_with_backoff(serve, status, stream):
+    fake = FlakyOllama(failures=2, status=status, latency=0.0)
+    client = serve(fake, max_in_flight=1, retries=2, backoff=0.05)
+
+    started = time.perf_counter()
+    if stream:
+        assert "".join(client.generate_stream(PROMPT)) == "Ana Maria Ruiz"
+    else:
+        assert client.generate(PROMPT)["response"] == "Ana Maria Ruiz"
+    assert time.perf_counter() - started >= 0.05 + 0.1 # backoff, then twice the backoff
+    assert len(fake.requests) == 3
+
+def test_error_is_raised_once_the_retries_are_used_up(serve):
+    fake = FlakyOllama(failures=3, status=503, latency=0.0)
+    client = serve(fake, max_in_flight=1, retries=1, backoff=0.01)
+
+    with pytest.raises(requests.HTTPError) as error:
+        client.generate(PROMPT)
+    assert error.value.response.status_code == 503
+    assert len(fake.requests) == 2
+
+    # The failed attempts gave their in-flight slot back (max_in_flight=1), one failure is left to retry.
+    assert client.generate(PROMPT)["response"] == "Ana Maria Ruiz"
+    assert len(fake.requests) == 4
+
+@pytest.mark.parametrize("status", [400, 404])
+def test_client_errors_are_not_retried(serve, status):
+    fake = FlakyOllama(failures=1, status=status, latency=0.0)
+    client = serve(fake, max_in_flight=1, retries=2, backoff=0.01)
+
+    with pytest.raises(requests.HTTPError) as error:
+        client.generate(PROMPT)
+    assert error.value.response.status_code == status
+    assert len(fake.requests) == 1
+    assert client.generate(PROMPT)["response"] == "Ana Maria Ruiz"
+
+def test_answers_keep_the_field_order_under_concurrent_dispatch(serve):
+    labels = make_labels(8)
+    transcript, expected = make_transcript(labels, 100)
+    fake = SlowFirstOllama(labels, latency=0.0, parallel=len(labels))
+    client = serve(fake, max_in_flight=len(labels), retries=0)
+
+    t2j = textToJSON(transcript, labels, client=client, cache=False, stream=True)
+    arrival_order = [field for field, _ in t2j.stream_fields()]
+
+    assert arrival_order != labels # the answers arrived out of order...
+    assert list(t2j.get_data()) == labels # ...and are stored in the template's order
+    assert t2j.get_data() == expected
@@ -0,0 +1,89 @@
+import os
+import time
+import threading
+import pytest
+import llm_client
+from benchmarks.fake_ollama import FakeOllama
+from benchmarks.synthetic import make_labels, make_transcript, make_form
+from llm_client import OllamaClient, ExtractionCancelled
+from backend import Fill, textToJSON
+
+
+@pytest.fixture
+def slow_ollama(default_client, monkeypatch):
+    """ A fake Ollama that takes a while per request and per generated token, serving one request at a time. """
+    fake = FakeOllama(latency=0.02, per_output_token=0.02, parallel=1).start()
+    client = OllamaClient(url=fake.url, max_in_flight=1, retries=0)
+    monkeypatch.setattr(llm_client, "_default_client", client)
+    yield fake
+    client.close()
+    fake.stop()
+
+@pytest.fixture
+def form(tmp_path):
+    labels = make_labels(12)
+    pdf_form = str(tmp_path / "form.pdf")
+    make_form(pdf_form, labels)
+    transcript, expected = make_transcript(labels, 150)
+    return pdf_form, labels, transcript, expected
+
+
+def test_generate_stream_yields_pieces_then_returns_the_final_message(client):
+    stream = client.generate_stream("TEXT: The Victim name is Ana Maria Ruiz.\nTarget JSON field to find in text: Victim name")
+    pieces = []
+    try:
+        while True:
+            pieces.append(next(stream))
+    except StopIteration as stop:
+        final = stop.value
+
+    assert len(pieces) > 1 and "".join(pieces) == "Ana Maria Ruiz"
+    assert final["done"] and final["eval_count"] > 0
+
+@pytest.mark.parametrize("batch_size", [None, 5])
+def test_field_events_arrive_before_done(default_client, form, batch_size):
+    pdf_form, labels, transcript, expected = form
+    events = list(Fill.fill_form_stream(transcript, labels, pdf_form, batch_size=batch_size))
+
+    assert [event["event"] for event in events] == ["field"] * len(labels) + ["done"]
+    assert {event["field"]: event["value"] for event in events[:-1]} == expected
+    assert events[-1]["output"] == pdf_form[:-4] + "_filled.pdf" and os.path.exists(events[-1]["output"])
+
+def test_batched_fields_are_emitted_while_the_json_is_generated(slow_ollama, form):
+    pdf_form, labels, transcript, expected = form
+    t2j = textToJSON(transcript, labels, batch_size=len(labels), stream=True)
+
+    in_flight_at_first_field = None
+    for field, value in t2j.stream_fields():
+        if in_flight_at_first_field is None:
+            in_flight_at_first_field = slow_ollama.in_flight
+        assert value == expected[field]
+
+    assert len(slow_ollama.requests) == 1
+    assert in_flight_at_first_field == 1 # the batched answer was still being generated
+
+@pytest.mark.parametrize("batch_size", [None, 4])
+def test_cancel_stops_requests_and_writes_no_pdf(slow_ollama, form, batch_size):
+    pdf_form, labels, transcript, _ = form
+    cancel = threading.Event()
+    fields_seen = 0
+
+    with pytest.raises(ExtractionCancelled):
+        for event in Fill.fill_form_stream(transcript, labels, pdf_form, batch_size=batch_size, cancel=cancel):
+            fields_seen += 1
+            cancel.set()
+            requests_at_cancel = len(slow_ollama.requests)
+
+    time.sleep(0.3) # requests that would still be sent would show up by now
+    assert fields_seen == 1
+    assert len(slow_ollama.requests) <= requests_at_cancel + 1 # at most the one already waiting on the connection
+    assert len(slow_ollama.requests) < (len(labels) if batch_size is None else 3)
+    assert not os.path.exists(pdf_form[:-4] + "_filled.pdf")
+
+def test_cancel_closes_a_stream_that_is_being_generated(client):
+    cancel = threading.Event()
+    stream = client.generate_stream("TEXT: The Victim name is Ana Maria Ruiz.\nTarget JSON field to find in text: Victim name", cancel=cancel)
+    assert next(stream) == "Ana"
+    cancel.set()
+    with pytest.raises(ExtractionCancelled):
+        next(stream)
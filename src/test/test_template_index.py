@@ -0,0 +1,90 @@
+import os
+import pytest
+import template_index
+from pdfrw import PdfReader
+from template_index import TemplateIndex
+from backend import write_filled_pdf
+from benchmarks.synthetic import make_labels, make_form
+
+
+LABELS = make_labels(8)
+
+
+@pytest.fixture(autouse=True)
+def default_index(tmp_path, monkeypatch):
+    """ write_filled_pdf uses the process-wide index, keep it out of data/. """
+    monkeypatch.setattr(template_index, "_default_index", None)
+    monkeypatch.setenv("TEMPLATE_INDEX_DIR", str(tmp_path / "default_index"))
+
+@pytest.fixture
+def compiles(monkeypatch):
+    """ Counts the template compilations (full parses of the widgets). """
+    calls = []
+    compile = TemplateIndex.compile
+    def counting_compile(self, pdf_form, pdf=None):
+        calls.append(pdf_form)
+        return compile(self, pdf_form, pdf)
+    monkeypatch.setattr(TemplateIndex, "compile", counting_compile)
+    return calls
+
+@pytest.fixture
+def form(tmp_path):
+    pdf_form = str(tmp_path / "form.pdf")
+    make_form(pdf_form, LABELS, widgets_per_page=3) # 3 pages
+    return pdf_form
+
+def new_index(tmp_path):
+    return TemplateIndex(str(tmp_path / "index"))
+
+
+def test_visual_order_continues_across_pages(tmp_path, form):
+    index = new_index(tmp_path).get(form)
+
+    assert [widget["page"] for widget in index["widgets"]] == [0, 0, 0, 1, 1, 1, 2, 2]
+    assert [widget["order"] for widget in index["widgets"]] == list(range(len(LABELS)))
+    assert new_index(tmp_path).field_names(form) == LABELS
+
+def test_answers_are_written_to_the_fields_of_every_page(tmp_path, form):
+    answers = [f"value {i}" for i in range(len(LABELS))]
+    output = write_filled_pdf(form, answers, str(tmp_path / "filled.pdf"))
+
+    values = {annot.T[1:-1]: annot.V[1:-1] for page in PdfReader(output).pages for annot in page.Annots}
+    assert values == dict(zip(LABELS, answers))
+
+def test_index_is_reused_from_memory_and_disk(tmp_path, form, compiles):
+    index = new_index(tmp_path)
+    first = index.get(form)
+    assert index.get(form) is first
+    assert len(os.listdir(tmp_path / "index")) == 1
+
+    assert new_index(tmp_path).get(form) == first # another process loads the index file
+    assert len(compiles) == 1
+
+def test_touched_template_with_same_content_is_not_recompiled(tmp_path, form, compiles):
+    first = new_index(tmp_path).get(form)
+    os.utime(form, (first["mtime"] + 100, first["mtime"] + 100))
+
+    index = new_index(tmp_path)
+    assert index.field_names(form) == LABELS
+    assert index.get(form)["mtime"] == first["mtime"] + 100 # refreshed, the content hash is not computed again
+    assert new_index(tmp_path).get(form)["mtime"] == first["mtime"] + 100
+    assert len(compiles) == 1
+
+def test_changed_template_is_recompiled(tmp_path, form, compiles):
+    index = new_index(tmp_path)
+    first = index.get(form)
+    make_form(form, LABELS[::-1], widgets_per_page=3)
+    os.utime(form, (first["mtime"] + 100, first["mtime"] + 100))
+
+    assert index.field_names(form) == LABELS[::-1]
+    assert new_index(tmp_path).field_names(form) == LABELS[::-1]
+    assert len(compiles) == 2
+
+def test_invalidate_forgets_the_index(tmp_path, form, compiles):
+    index = new_index(tmp_path)
+    index.get(form)
+    index.invalidate(form)
+    assert os.listdir(tmp_path / "index") == []
+
+    index.get(form)
+    assert len(compiles) == 2
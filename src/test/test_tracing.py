@@ -0,0 +1,43 @@
+import threading
+import pytest
+import tracing
+from tracing import span, metrics_summary, reset_metrics
+from llm_client import ExtractionCancelled
+
+
+@pytest.fixture(autouse=True)
+def clean_metrics():
+    reset_metrics()
+    yield
+    reset_metrics()
+
+
+def test_summary_covers_every_span_but_keeps_a_bounded_window(monkeypatch):
+    monkeypatch.setattr(tracing, "PERCENTILE_WINDOW", 10)
+    for i in range(25):
+        with span("step", eval_count=2):
+            pass
+
+    summary = metrics_summary()["step"]
+    assert summary["count"] == 25
+    assert summary["eval_count"] == 50
+    assert summary["max_ms"] >= summary["p95_ms"] >= summary["p50_ms"]
+    assert len(tracing._durations["step"]["recent"]) == 10
+
+def test_skipped_spans_are_left_out_and_errors_still_raise():
+    with pytest.raises(ValueError):
+        with span("step") as attributes:
+            attributes["skip_metrics"] = True
+            raise ValueError()
+    assert "step" not in metrics_summary()
+
+def test_cancelled_requests_are_not_counted(client):
+    cancel = threading.Event()
+    cancel.set()
+    with pytest.raises(ExtractionCancelled):
+        client.generate("The Victim name is Ana.", cancel=cancel)
+    with pytest.raises(ExtractionCancelled):
+        list(client.generate_stream("The Victim name is Ana.", cancel=cancel))
+    client.generate("The Victim name is Ana.")
+
+    assert metrics_summary()["llm_request"]["count"] == 1
@@ -0,0 +1,141 @@
+import os
+import json
+import threading
+import urllib.error
+import urllib.request
+import pytest
+from http.server import ThreadingHTTPServer
+from benchmarks.synthetic import make_labels, make_transcript, make_form
+from worker import FillWorker, make_handler
+
+
+class WorkerServer():
+    """ Serves a FillWorker over HTTP on a free port, like worker.serve() does. """
+    def __init__(self, worker, started):
+        self.worker = worker
+        self.started = started # whether the worker slots (and the PDF process pool) were started
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(worker))
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True).start()
+
+    def request(self, method, path, body=None):
+        """ Returns (HTTP status, decoded JSON body, or the list of NDJSON lines). """
+        data = json.dumps(body).encode("utf-8") if body is not None else None
+        url = f"http://127.0.0.1:{self.server.server_address[1]}{path}"
+        try:
+            response = urllib.request.urlopen(urllib.request.Request(url, data=data, method=method))
+        except urllib.error.HTTPError as e:
+            response = e
+        with response:
+            text = response.read().decode("utf-8")
+            if response.headers["Content-Type"] == "application/x-ndjson":
+                return response.status, [json.loads(line) for line in text.splitlines()]
+            return response.status, json.loads(text)
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def serve(default_client):
+    servers = []
+
+    def start(start_slots=True, **kwargs):
+        worker = FillWorker(pdf_workers=1, **kwargs)
+        if start_slots:
+            worker.start()
+        servers.append(WorkerServer(worker, start_slots))
+        return servers[-1]
+
+    yield start
+    for server in servers:
+        if server.worker.stats()["accepting"] and server.started:
+            server.worker.drain() # also stops the PDF process pool
+        server.stop()
+
+@pytest.fixture
+def job(tmp_path):
+    labels = make_labels(4)
+    pdf_form = str(tmp_path / "form.pdf")
+    make_form(pdf_form, labels)
+    transcript, expected = make_transcript(labels, 100)
+    return {"transcription": transcript, "template": labels, "pdf": pdf_form}, expected
+
+
+@pytest.mark.parametrize("body", [
+    [],
+    {"template": ["Name"], "pdf": "form.pdf"},
+    {"transcription": 1, "template": ["Name"], "pdf": "form.pdf"},
+    {"transcription": "x"},
+    {"transcription": "x", "template": "Name", "pdf": "form.pdf"},
+    {"transcription": "x", "template": ["Name"], "pdf": 1},
+    {"transcription": "x", "templates": {"pdf": "form.pdf", "template": ["Name"]}},
+    {"transcription": "x", "templates": []},
+    {"transcription": "x", "templates": [{"pdf": 1}]},
+    {"transcription": "x", "templates": [{"pdf": "form.pdf", "template": "Name"}]},
+    {"transcription": "x", "templates": ["form.pdf"]},
+    {"transcription": "x", "templates": [{"pdf": "form.pdf", "template": ["Name"]}], "output_dir": 1},
+    {"transcription": "x", "template": ["Name"], "pdf": "form.pdf", "batch_size": 0},
+    {"transcription": "x", "template": ["Name"], "pdf": "form.pdf", "context_budget": "300"},
+])
+def test_invalid_jobs_are_rejected(serve, body):
+    status, response = serve(start_slots=False).request("POST", "/jobs", body)
+    assert status == 400 and response["error"]
+
+def test_full_queue_returns_429(serve, job):
+    server = serve(start_slots=False, queue_size=1)
+    assert server.request("POST", "/jobs", job[0])[0] == 202
+    assert server.request("POST", "/jobs", job[0])[0] == 429
+    assert server.request("GET", "/health")[1]["queued"] == 1
+
+def test_unknown_job_returns_404(serve):
+    server = serve(start_slots=False)
+    for method, path in (("GET", "/jobs/nope"), ("GET", "/jobs/nope/events"), ("POST", "/jobs/nope/cancel")):
+        assert server.request(method, path)[0] == 404
+
+def test_job_runs_and_streams_its_events(serve, job):
+    server = serve()
+    status, submitted = server.request("POST", "/jobs", job[0])
+    assert status == 202
+
+    status, events = server.request("GET", f"/jobs/{submitted['job_id']}/events")
+    assert status == 200
+    assert [event["event"] for event in events] == ["queued", "started"] + ["field"] * len(job[1]) + ["done"]
+    assert {event["field"]: event["value"] for event in events if event["event"] == "field"} == job[1]
+
+    status, finished = server.request("GET", f"/jobs/{submitted['job_id']}")
+    assert finished["status"] == "done" and os.path.exists(finished["result"])
+
+def test_multi_template_job_uses_the_shared_pool(serve, job, tmp_path):
+    body = {"transcription": job[0]["transcription"], "templates": [{"pdf": job[0]["pdf"], "template": job[0]["template"]}] * 2, "output_dir": str(tmp_path / "out")}
+    server = serve()
+    for _ in range(2):
+        job_id = server.request("POST", "/jobs", body)[1]["job_id"]
+        server.request("GET", f"/jobs/{job_id}/events")
+        finished = server.request("GET", f"/jobs/{job_id}")[1]
+        assert finished["status"] == "done"
+        assert [entry["output"] for entry in finished["result"]] == [str(tmp_path / "out" / f"form_filled_{i}.pdf") for i in (1, 2)]
+
+def test_cancelled_queued_job_never_runs(serve, job, fake_ollama):
+    server = serve(start_slots=False)
+    job_id = server.request("POST", "/jobs", job[0])[1]["job_id"]
+
+    status, cancelled = server.request("POST", f"/jobs/{job_id}/cancel")
+    assert status == 200 and cancelled["status"] == "cancelled"
+    assert [event["event"] for event in server.request("GET", f"/jobs/{job_id}/events")[1]] == ["queued", "cancelled"]
+
+    server.worker.start()
+    server.worker.drain()
+    assert server.request("GET", f"/jobs/{job_id}")[1]["status"] == "cancelled"
+    assert fake_ollama.requests == []
+
+def test_drain_finishes_queued_jobs_and_rejects_new_ones(serve, job):
+    server = serve(slots=1)
+    job_ids = [server.request("POST", "/jobs", job[0])[1]["job_id"] for _ in range(3)]
+
+    server.worker.drain()
+    assert [server.request("GET", f"/jobs/{job_id}")[1]["status"] for job_id in job_ids] == ["done"] * 3
+    status, response = server.request("POST", "/jobs", job[0])
+    assert status == 503 and response["error"]
+    assert server.request("GET", "/health")[1]["accepting"] is False
@@ -0,0 +1,109 @@
+import os
+import json
+import time
+import logging
+import threading
+from collections import deque
+from contextlib import contextmanager
+
+
+# Span attributes that are added up in the metrics summary (Ollama token counts and durations).
+SUMMED_ATTRIBUTES = ("prompt_eval_count", "eval_count", "prompt_eval_duration_ms", "eval_duration_ms")
+
+# Durations kept per span name for the p50/p95 figures, the older ones are dropped (count, total and max cover them all).
+PERCENTILE_WINDOW = 1024
+
+_lock = threading.Lock()
+_trace_file = None
+_durations = {} # span name -> {"count", "total", "max", "recent": deque of the last durations}, in seconds
+_totals = {} # span name -> {attribute: sum}
+
+
+def configure_logging(level=None):
+    """ Sets up logging for the command line entry points, LOG_LEVEL (default INFO) sets the level. """
+    logging.basicConfig(
+        level=(level or os.environ.get("LOG_LEVEL", "INFO")).upper(),
+        format="%(asctime)s %(levelname)s %(name)s: %(message)s"
+    )
+
+def configure_tracing(path):
+    """ Appends every finished span as one JSON line to path (None stops writing the trace). """
+    global _trace_file
+    with _lock:
+        if _trace_file is not None:
+            _trace_file.close()
+        _trace_file = open(path, "a", encoding="utf-8") if path else None
+
+@contextmanager
+def span(name, **attributes):
+    """
+        Times the block and records it as a span: added to the metrics summary and, if a trace file is
+        configured, written to it. Yields the attribute dict, so the block can attach results to it
+        (e.g. the token counts returned by Ollama). A span whose block sets attributes["skip_metrics"] is only
+        written to the trace file, e.g. an LLM request that was cancelled before it was sent.
+    """
+    started_at = time.time()
+    start = time.perf_counter()
+    error = None
+    try:
+        yield attributes
+    except BaseException as e:
+        error = type(e).__name__
+        raise
+    finally:
+        duration = time.perf_counter() - start
+        record = {"span": name, "start": started_at, "duration_ms": round(duration * 1000, 3), "thread": threading.current_thread().name, "pid": os.getpid()}
+        record.update(attributes)
+        if error is not None:
+            record["error"] = error
+        with _lock:
+            if _trace_file is not None:
+                _trace_file.write(json.dumps(record, default=str) + "\n")
+                _trace_file.flush()
+            if not attributes.get("skip_metrics"):
+                durations = _durations.setdefault(name, {"count": 0, "total": 0.0, "max": 0.0, "recent": deque(maxlen=PERCENTILE_WINDOW)})
+                durations["count"] += 1
+                durations["total"] += duration
+                durations["max"] = max(durations["max"], duration)
+                durations["recent"].append(duration)
+                totals = _totals.setdefault(name, {})
+                for key in SUMMED_ATTRIBUTES:
+                    if type(attributes.get(key)) in (int, float):
+                        totals[key] = totals.get(key, 0) + attributes[key]
+
+def metrics_summary():
+    """
+        Per span name: count, total/mean/max duration over the whole run, p50/p95 over the last
+        PERCENTILE_WINDOW spans, and the summed Ollama counters.
+    """
+    with _lock:
+        durations = {name: dict(values, recent=sorted(values["recent"])) for name, values in _durations.items()}
+        totals = {name: dict(values) for name, values in _totals.items()}
+
+    summary = {}
+    for name, values in durations.items():
+        summary[name] = {
+            "count": values["count"],
+            "total_ms": round(values["total"] * 1000, 3),
+            "mean_ms": round(values["total"] / values["count"] * 1000, 3),
+            "p50_ms": round(percentile(values["recent"], 50) * 1000, 3),
+            "p95_ms": round(percentile(values["recent"], 95) * 1000, 3),
+            "max_ms": round(values["max"] * 1000, 3),
+        }
+        summary[name].update(totals.get(name, {}))
+    return summary
+
+def reset_metrics():
+    with _lock:
+        _durations.clear()
+        _totals.clear()
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(p / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+if os.environ.get("TRACE_FILE"):
+    configure_tracing(os.environ["TRACE_FILE"])
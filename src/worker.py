@@ -0,0 +1,330 @@
+import os
+import json
+import logging
+import time
+import uuid
+import queue
+import signal
+import argparse
+import threading
+from collections import OrderedDict
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from main import run_pdf_fill_stream, run_pdf_fill_many
+from backend import make_pdf_pool
+from llm_client import ExtractionCancelled
+from extraction_cache import get_default_cache
+from tracing import configure_logging, metrics_summary
+
+
+logger = logging.getLogger(__name__)
+
+
+class FillWorker():
+    """
+        Long-lived fill worker. Jobs go into a bounded queue and are run by a fixed number of
+        worker slots (threads), so the interpreter, the imports, the LLM connection pool and the process
+        pool that writes multi-template PDFs stay warm between requests.
+        Job lifecycle: queued -> running -> done | failed | cancelled.
+        Every job also records progress events ("queued", "started", one "field" per extracted field,
+        then "done", "failed" or "cancelled") that can be followed while the job runs, see events().
+    """
+    def __init__(self, slots=2, queue_size=32, max_finished=1000, pdf_workers=None):
+        self.slots = slots
+        self.pdf_workers = pdf_workers or os.cpu_count() or 1
+        self.__queue = queue.Queue(maxsize=queue_size)
+        self.__jobs = OrderedDict() # job_id -> job dict
+        self.__max_finished = max_finished # finished jobs kept around for polling
+        self.__events = {} # job_id -> list of progress events
+        self.__cancels = {} # job_id -> threading.Event
+        self.__lock = threading.Lock()
+        self.__changed = threading.Condition(self.__lock) # notified whenever an event is published
+        self.__accepting = True
+        self.__threads = []
+        self.__pdf_pool = None
+
+    def start(self):
+        self.__pdf_pool = make_pdf_pool(self.pdf_workers)
+        for i in range(self.slots):
+            thread = threading.Thread(target=self.__run, name=f"fill-slot-{i}", daemon=True)
+            thread.start()
+            self.__threads.append(thread)
+
+    def submit(self, request):
+        """
+            Queues a fill request and returns its job dict.
+            Raises queue.Full if the queue is at capacity and RuntimeError if the worker is draining.
+        """
+        job = {
+            "id": uuid.uuid4().hex,
+            "status": "queued",
+            "submitted_at": time.time(),
+            "started_at": None,
+            "finished_at": None,
+            "result": None,
+            "error": None,
+        }
+        with self.__lock:
+            if not self.__accepting:
+                raise RuntimeError("Worker is shutting down, not accepting new jobs.")
+            self.__queue.put_nowait((job, request))
+            self.__jobs[job["id"]] = job
+            self.__events[job["id"]] = []
+            self.__cancels[job["id"]] = threading.Event()
+            self.__publish(job, {"event": "queued"})
+        return job
+
+    def get(self, job_id):
+        with self.__lock:
+            job = self.__jobs.get(job_id)
+            return dict(job) if job else None
+
+    def cancel(self, job_id):
+        """
+            Cancels a job. A queued job is dropped, a running one stops its remaining LLM requests.
+            Returns the job, or None if it doesn't exist.
+        """
+        with self.__lock:
+            job = self.__jobs.get(job_id)
+            if job is None:
+                return None
+            self.__cancels[job_id].set()
+            if job["status"] == "queued":
+                job.update(status="cancelled", finished_at=time.time())
+                self.__publish(job, {"event": "cancelled"})
+            return dict(job)
+
+    def events(self, job_id):
+        """
+            Yields the progress events of a job, waiting for new ones until the job is finished.
+            Returns right away if the job doesn't exist.
+        """
+        sent = 0
+        while True:
+            with self.__changed:
+                events = self.__events.get(job_id, [])
+                if sent == len(events) and self.__is_running(job_id):
+                    self.__changed.wait()
+                    events = self.__events.get(job_id, [])
+                new_events = events[sent:]
+                finished = not self.__is_running(job_id)
+            for event in new_events:
+                yield event
+            sent += len(new_events)
+            if finished and not new_events:
+                return
+
+    def __is_running(self, job_id):
+        job = self.__jobs.get(job_id)
+        return job is not None and job["finished_at"] is None
+
+    def stats(self):
+        with self.__lock:
+            statuses = [job["status"] for job in self.__jobs.values()]
+        cache = get_default_cache()
+        return {
+            "accepting": self.__accepting,
+            "slots": self.slots,
+            "queued": self.__queue.qsize(),
+            "running": statuses.count("running"),
+            "queue_capacity": self.__queue.maxsize,
+            "extraction_cache": cache.stats() if cache is not None else None,
+            "timings": metrics_summary(),
+        }
+
+    def drain(self):
+        """ Stops accepting jobs, waits for every queued and running job to finish, then stops the slots. """
+        with self.__lock:
+            self.__accepting = False
+        self.__queue.join()
+        for _ in self.__threads:
+            self.__queue.put((None, None))
+        for thread in self.__threads:
+            thread.join()
+        self.__pdf_pool.shutdown()
+
+    def __run(self):
+        while True:
+            job, request = self.__queue.get()
+            if job is None:
+                self.__queue.task_done()
+                return
+
+            with self.__lock:
+                cancel = self.__cancels[job["id"]]
+                if job["status"] == "cancelled":
+                    self.__queue.task_done()
+                    continue
+                job["status"] = "running"
+                job["started_at"] = time.time()
+                self.__publish(job, {"event": "started"})
+            try:
+                result = self.__execute(job, request, cancel)
+                update = {"status": "done", "result": result}
+            except ExtractionCancelled:
+                update = {"status": "cancelled"}
+            except Exception as e:
+                update = {"status": "failed", "error": str(e)}
+
+            with self.__lock:
+                job.update(update, finished_at=time.time())
+                self.__publish(job, dict({"event": update["status"]}, **{k: v for k, v in update.items() if k != "status"}))
+                self.__prune()
+            self.__queue.task_done()
+
+    def __execute(self, job, request, cancel):
+        batch_size = request.get("batch_size")
+        context_budget = request.get("context_budget")
+        if "templates" in request:
+            templates = [(t["pdf"], t["template"]) for t in request["templates"]]
+            manifest = run_pdf_fill_many(request["transcription"], templates, batch_size=batch_size, output_dir=request.get("output_dir"), cancel=cancel, context_budget=context_budget, pool=self.__pdf_pool)
+            if manifest is None:
+                raise FileNotFoundError("PDF template not found")
+            return manifest
+
+        for event in run_pdf_fill_stream(request["transcription"], request["template"], request["pdf"], batch_size=batch_size, cancel=cancel, context_budget=context_budget):
+            if event["event"] == "done":
+                return event["output"]
+            with self.__lock:
+                self.__publish(job, event)
+
+    def __publish(self, job, event):
+        """ Records a progress event of job and wakes up the events() readers. Call with the lock held. """
+        self.__events[job["id"]].append(dict(event, job_id=job["id"], time=time.time()))
+        self.__changed.notify_all()
+
+    def __prune(self):
+        finished = [job_id for job_id, job in self.__jobs.items() if job["finished_at"] is not None]
+        for job_id in finished[:max(0, len(finished) - self.__max_finished)]:
+            del self.__jobs[job_id]
+            del self.__events[job_id]
+            del self.__cancels[job_id]
+
+
+def validate_request(request):
+    """ Returns what is wrong with the body of a POST /jobs request, None if it can be queued. """
+    if type(request) != dict or type(request.get("transcription")) != str or not request["transcription"]:
+        return "Missing 'transcription'"
+    if "templates" in request:
+        templates = request["templates"]
+        if type(templates) != list or not templates:
+            return "'templates' must be a non-empty list"
+        for template in templates:
+            if type(template) != dict or type(template.get("pdf")) != str or type(template.get("template")) != list:
+                return "Every entry of 'templates' must have a 'pdf' path and a 'template' list"
+        if request.get("output_dir") is not None and type(request["output_dir"]) != str:
+            return "'output_dir' must be a path"
+    elif type(request.get("template")) != list or type(request.get("pdf")) != str or not request["pdf"]:
+        return "Missing 'template' list and 'pdf' path, or 'templates'"
+    for key in ("batch_size", "context_budget"):
+        value = request.get(key)
+        if value is not None and (type(value) != int or value < 1):
+            return f"'{key}' must be a positive integer"
+    return None
+
+
+def make_handler(worker):
+    class FillRequestHandler(BaseHTTPRequestHandler):
+        """
+            POST /jobs                  -> {"transcription", "template", "pdf", "batch_size"?, "context_budget"?} or {"transcription", "templates": [{"pdf", "template"}]}
+            GET  /jobs/<job_id>         -> job status and result
+            GET  /jobs/<job_id>/events  -> progress events as NDJSON, streamed until the job is finished
+            POST /jobs/<job_id>/cancel  -> cancels the job
+            GET  /health                -> queue, extraction cache and timing statistics
+        """
+        def do_POST(self):
+            path = self.path.rstrip("/")
+            if path.startswith("/jobs/") and path.endswith("/cancel"):
+                job = worker.cancel(path[len("/jobs/"):-len("/cancel")])
+                if job is None:
+                    return self.send_json(404, {"error": "Job not found"})
+                return self.send_json(200, job)
+            if path != "/jobs":
+                return self.send_json(404, {"error": "Not found"})
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                request = json.loads(self.rfile.read(length) or b"{}")
+            except ValueError:
+                return self.send_json(400, {"error": "Body must be JSON"})
+
+            error = validate_request(request)
+            if error:
+                return self.send_json(400, {"error": error})
+
+            try:
+                job = worker.submit(request)
+            except queue.Full:
+                return self.send_json(429, {"error": "Job queue is full, retry later"})
+            except RuntimeError as e:
+                return self.send_json(503, {"error": str(e)})
+            self.send_json(202, {"job_id": job["id"], "status": job["status"]})
+
+        def do_GET(self):
+            path = self.path.rstrip("/")
+            if path == "/health":
+                return self.send_json(200, worker.stats())
+            if path.startswith("/jobs/") and path.endswith("/events"):
+                return self.send_events(path[len("/jobs/"):-len("/events")])
+            if path.startswith("/jobs/"):
+                job = worker.get(path[len("/jobs/"):])
+                if job is None:
+                    return self.send_json(404, {"error": "Job not found"})
+                return self.send_json(200, job)
+            self.send_json(404, {"error": "Not found"})
+
+        def send_json(self, status, body):
+            data = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def send_events(self, job_id):
+            if worker.get(job_id) is None:
+                return self.send_json(404, {"error": "Job not found"})
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.send_header("Cache-Control", "no-cache")
+            self.end_headers()
+            try:
+                for event in worker.events(job_id):
+                    self.wfile.write(json.dumps(event).encode("utf-8") + b"\n")
+                    self.wfile.flush()
+            except (BrokenPipeError, ConnectionResetError):
+                pass # the client stopped listening, the job keeps running
+
+        def log_message(self, format, *args):
+            pass
+
+    return FillRequestHandler
+
+
+def serve(host, port, slots, queue_size):
+    worker = FillWorker(slots=slots, queue_size=queue_size)
+    worker.start()
+    server = ThreadingHTTPServer((host, port), make_handler(worker))
+    server.daemon_threads = True
+
+    def shutdown(signum, frame):
+        logger.info(f"Received signal {signum}, draining {worker.stats()['queued']} queued job(s)...")
+        # drain() blocks until the jobs are done, keep serving status requests meanwhile.
+        threading.Thread(target=lambda: (worker.drain(), server.shutdown()), daemon=True).start()
+
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+
+    logger.info(f"Fill worker listening on http://{host}:{port} ({slots} slot(s), queue size {queue_size})")
+    server.serve_forever()
+    server.server_close()
+    logger.info("Fill worker stopped.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Long-lived PDF fill worker.")
+    parser.add_argument("--host", default=os.environ.get("FILL_WORKER_HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(os.environ.get("FILL_WORKER_PORT", 5005)))
+    parser.add_argument("--slots", type=int, default=int(os.environ.get("FILL_WORKER_SLOTS", 2)), help="jobs running at the same time")
+    parser.add_argument("--queue-size", type=int, default=int(os.environ.get("FILL_WORKER_QUEUE_SIZE", 32)), help="max queued jobs before new ones are rejected")
+    args = parser.parse_args()
+    configure_logging()
+    serve(args.host, args.port, args.slots, args.queue_size)